@@ -0,0 +1,73 @@
+"""post full-text search vector
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:00:00.000000
+
+Adds posts.search_vector, kept up to date by a trigger on insert and on
+content updates, backfills it in batches and builds the GIN index
+concurrently so the posts table is never locked for long.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('english', COALESCE(NEW.content, ''));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER posts_search_vector_update
+        BEFORE INSERT OR UPDATE OF content ON posts
+        FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update()
+    """)
+
+    backfill = """
+        UPDATE posts SET search_vector = to_tsvector('english', COALESCE(content, ''))
+        WHERE id IN (
+            SELECT id FROM posts WHERE search_vector IS NULL LIMIT {batch}
+        )
+    """.format(batch=BACKFILL_BATCH_SIZE)
+
+    with op.get_context().autocommit_block():
+        if context.is_offline_mode():
+            op.execute(
+                "UPDATE posts SET search_vector = to_tsvector('english', COALESCE(content, '')) "
+                "WHERE search_vector IS NULL"
+            )
+        else:
+            # Short transactions per batch instead of one long table-wide UPDATE
+            bind = op.get_bind()
+            while bind.execute(sa.text(backfill)).rowcount:
+                pass
+
+        op.create_index(
+            'ix_posts_search_vector', 'posts', ['search_vector'],
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_search_vector', table_name='posts', postgresql_concurrently=True)
+    op.execute("DROP TRIGGER IF EXISTS posts_search_vector_update ON posts")
+    op.execute("DROP FUNCTION IF EXISTS posts_search_vector_update()")
+    op.drop_column('posts', 'search_vector')
@@ -0,0 +1,34 @@
+"""post content trigram index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:00:00.000000
+
+Enables pg_trgm and builds a GIN trigram index on posts.content so that
+substring (ILIKE '%q%') and fuzzy word-similarity searches use an index.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_content_trgm', 'posts', ['content'],
+            postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_content_trgm', table_name='posts', postgresql_concurrently=True)
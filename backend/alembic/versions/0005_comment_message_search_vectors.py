@@ -0,0 +1,77 @@
+"""comment and message full-text search vectors
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:00:00.000000
+
+Same scheme as posts.search_vector (0002): a trigger maintains the
+tsvector on insert and content update, existing rows are backfilled in
+batches and the GIN indexes are built concurrently.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('comments', 'messages')
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION content_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('english', COALESCE(NEW.content, ''));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table in TABLES:
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(f"""
+            CREATE TRIGGER {table}_search_vector_update
+            BEFORE INSERT OR UPDATE OF content ON {table}
+            FOR EACH ROW EXECUTE FUNCTION content_search_vector_update()
+        """)
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            if context.is_offline_mode():
+                op.execute(
+                    f"UPDATE {table} SET search_vector = to_tsvector('english', COALESCE(content, '')) "
+                    "WHERE search_vector IS NULL"
+                )
+            else:
+                # Short transactions per batch instead of one long table-wide UPDATE
+                backfill = sa.text(f"""
+                    UPDATE {table} SET search_vector = to_tsvector('english', COALESCE(content, ''))
+                    WHERE id IN (
+                        SELECT id FROM {table} WHERE search_vector IS NULL LIMIT {BACKFILL_BATCH_SIZE}
+                    )
+                """)
+                bind = op.get_bind()
+                while bind.execute(backfill).rowcount:
+                    pass
+
+            op.create_index(
+                f'ix_{table}_search_vector', table, ['search_vector'],
+                postgresql_using='gin', postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(f'ix_{table}_search_vector', table_name=table, postgresql_concurrently=True)
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector_update ON {table}")
+        op.drop_column(table, 'search_vector')
+    op.execute("DROP FUNCTION IF EXISTS content_search_vector_update()")
@@ -0,0 +1,40 @@
+"""typeahead prefix indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00.000000
+
+lower(column) text_pattern_ops indexes so that typeahead prefix matches
+(lower(col) LIKE 'q%') are index range scans regardless of collation.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_users_username_prefix', 'users', 'username'),
+    ('ix_users_full_name_prefix', 'users', 'full_name'),
+    ('ix_families_name_prefix', 'families', 'name'),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name, table, [sa.text(f'lower({column}) text_pattern_ops')],
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,51 @@
+"""case-insensitive unique family names
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 15:00:00.000000
+
+Replaces the lower(name) prefix index with a unique one, so that family
+lookups are a single indexed equality match and concurrent "Smith" /
+"smith" creations resolve through INSERT ... ON CONFLICT (lower(name)).
+The text_pattern_ops operator class keeps prefix (typeahead) matches
+on the same index.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode():
+        duplicates = op.get_bind().execute(sa.text(
+            "SELECT lower(name) FROM families GROUP BY lower(name) HAVING count(*) > 1"
+        )).scalars().all()
+        if duplicates:
+            # A failed concurrent build would leave an INVALID index behind
+            raise RuntimeError(
+                "Families differing only by case must be merged before this migration: "
+                + ", ".join(duplicates)
+            )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_families_name_lower', 'families', [sa.text('lower(name) text_pattern_ops')],
+            unique=True, postgresql_concurrently=True
+        )
+        op.drop_index('ix_families_name_prefix', table_name='families', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_families_name_prefix', 'families', [sa.text('lower(name) text_pattern_ops')],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_families_name_lower', table_name='families', postgresql_concurrently=True)
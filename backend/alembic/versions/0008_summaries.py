@@ -0,0 +1,57 @@
+"""stored llm summaries
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 16:00:00.000000
+
+Adds the summaries table. A summary is keyed by kind, family (plus the
+subject/viewer pair for user summaries), date and model, and is reused
+while the fingerprint of its input posts and messages is unchanged.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'summaries',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('family_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('subject_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('viewer_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('summary_date', sa.Date(), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['family_id'], ['families.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['subject_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['viewer_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Partial unique indexes: subject/viewer are NULL for family summaries
+    op.create_index(
+        'ix_summaries_family_key', 'summaries', ['family_id', 'summary_date', 'model'],
+        unique=True, postgresql_where=sa.text("kind = 'family'")
+    )
+    op.create_index(
+        'ix_summaries_user_key', 'summaries', ['family_id', 'subject_id', 'viewer_id', 'summary_date', 'model'],
+        unique=True, postgresql_where=sa.text("kind = 'user'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_summaries_user_key', table_name='summaries')
+    op.drop_index('ix_summaries_family_key', table_name='summaries')
+    op.drop_table('summaries')
@@ -0,0 +1,58 @@
+"""summary job queue
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:00:00.000000
+
+Adds the summary_jobs table, claimed by workers with
+SELECT ... FOR UPDATE SKIP LOCKED.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'summary_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('family_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('requested_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('subject_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('summary_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='queued', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['family_id'], ['families.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['subject_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Small partial index: workers only ever scan pending jobs
+    op.create_index(
+        'ix_summary_jobs_pending', 'summary_jobs', ['created_at'],
+        postgresql_where=sa.text("status IN ('queued', 'running')")
+    )
+    op.create_index(
+        'ix_summary_jobs_scheduled', 'summary_jobs', ['family_id', 'summary_date'],
+        unique=True, postgresql_where=sa.text('requested_by IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_summary_jobs_scheduled', table_name='summary_jobs')
+    op.drop_index('ix_summary_jobs_pending', table_name='summary_jobs')
+    op.drop_table('summary_jobs')
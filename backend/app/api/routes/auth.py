@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from uuid import UUID
 
-from app.database import get_db
-from app.models import User, Family, UserFamily
-from app.schemas import UserCreate, UserResponse, Token, LoginResponse, FamilyResponse, FamilySelection
+from app.database import get_db, get_read_db
+from app.models import User, UserFamily
+from app.schemas import (
+    UserCreate, UserResponse, Token, LoginResponse, FamilyResponse, FamilySelection,
+    MeResponse, FamilyWithActivity
+)
 from app.auth import verify_password, get_password_hash, create_access_token, get_current_user
+from app.services.family_service import (
+    resolve_or_create_families, invalidate_family_roster, get_user_families, get_user_families_with_counts
+)
 from app.config import settings
+from app.request_timing import TimedRoute
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=TimedRoute)
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+def signup(user_data: UserCreate, request: Request, db: Session = Depends(get_db)):
     # Check if username already exists
     if db.query(User).filter(User.username == user_data.username).first():
         raise HTTPException(
@@ -42,34 +49,18 @@ def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     db.add(db_user)
     db.flush()  # Flush to get user ID
     
-    # Create or get families and create user-family associations
-    for family_name in user_data.family_names:
-        family_name = family_name.strip()
-        if not family_name:
-            continue
-        
-        # Normalize family name (lowercase for case-insensitive matching)
-        normalized_name = family_name.lower()
-        
-        # Check if family exists (case-insensitive), if not create it
-        # First try exact match, then try case-insensitive
-        family = db.query(Family).filter(Family.name == family_name).first()
-        if not family:
-            # Try case-insensitive match
-            from sqlalchemy import func
-            family = db.query(Family).filter(func.lower(Family.name) == normalized_name).first()
-        
-        if not family:
-            # Create new family with the exact name provided by user
-            family = Family(name=family_name)
-            db.add(family)
-            db.flush()
-        
-        # Create user-family association
-        user_family = UserFamily(user_id=db_user.id, family_id=family.id)
-        db.add(user_family)
+    # Resolve all families in one query, creating missing ones in one insert
+    families = resolve_or_create_families(db, user_data.family_names)
+    
+    # Create user-family associations (flushed as a single batched insert)
+    family_ids = [family.id for family in families]
+    db.add_all([UserFamily(user_id=db_user.id, family_id=family_id) for family_id in family_ids])
     
     db.commit()
+    invalidate_family_roster(*family_ids)
+    # Signup carries no bearer token; stick the new user to the primary so
+    # their first reads (auth and membership checks included) see this row
+    request.state.db_sticky_key = str(db_user.id)
     db.refresh(db_user)
     return db_user
 
@@ -89,9 +80,8 @@ def login(
         )
     
     # Get user's families
-    user_families = db.query(UserFamily).filter(UserFamily.user_id == user.id).all()
-    family_ids = [uf.family_id for uf in user_families]
-    families = db.query(Family).filter(Family.id.in_(family_ids)).all()
+    families = get_user_families(db, user.id)
+    family_ids = [f.id for f in families]
     family_responses = [FamilyResponse.model_validate(f) for f in families]
     
     # Determine selected family
@@ -137,9 +127,25 @@ def login(
     )
 
 
-@router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return current_user
+@router.get("/me", response_model=MeResponse)
+def get_current_user_info(
+    include_families: bool = Query(False, description="Also return the user's families with activity counts"),
+    since: Optional[datetime] = Query(None, description="Count posts newer than this (default: last 24 hours)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    response = MeResponse.model_validate(current_user)
+    if include_families:
+        since = since or datetime.now(timezone.utc) - timedelta(hours=24)
+        response.families = [
+            FamilyWithActivity(
+                **FamilyResponse.model_validate(family).model_dump(),
+                unread_messages=unread_messages,
+                new_posts=new_posts
+            )
+            for family, unread_messages, new_posts in get_user_families_with_counts(db, current_user.id, since)
+        ]
+    return response
 
 
 @router.post("/select-family", response_model=Token)
@@ -2,18 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User, Post, Comment
 from app.schemas import CommentCreate, CommentUpdate, CommentResponse
 from app.auth import get_current_user, get_current_family_id
+from app.request_timing import TimedRoute
 
-router = APIRouter(prefix="/api", tags=["comments"])
+router = APIRouter(prefix="/api", tags=["comments"], route_class=TimedRoute)
 
 
 @router.get("/posts/{post_id}/comments", response_model=list[CommentResponse])
 def get_comments(
     post_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     family_id: UUID = Depends(get_current_family_id)
 ):
     post = db.query(Post).filter(
@@ -1,18 +1,37 @@
+import json
+import threading
+import time
+from concurrent.futures import wait
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 from datetime import datetime, date
 from uuid import UUID
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Literal, Optional
 
-from app.database import get_db
-from app.models import User, Post, Message, Family, UserFamily
+from app.config import settings
+from app.database import get_db, SessionLocal
+from app.metrics import metrics
+from app.models import User, Post, Message, Family, UserFamily, SummaryJob
 from app.auth import get_current_user, get_current_family_id
+from app.services.llm_resilience import submit_llm_task
 from app.services.llm_service import GroqLLMService
+from app.services.summary_inputs import MemberDayStats, load_member_day_items, load_member_day_stats
+from app.services.summary_service import (
+    SummaryKey, user_fingerprint, user_llm_args, user_messages_with_you, load_member_summaries, save_summary,
+    build_family_summary, build_user_summary, stream_family_summary, stream_user_summary
+)
+from app.services.summary_jobs import submit_job
 from app.schemas import FamilyResponse, FamilyCreate
+from app.services.family_service import (
+    find_family_by_name, insert_family_if_absent, resolve_or_create_family,
+    get_family_roster, find_member, invalidate_family_roster,
+    get_user_families as load_user_families
+)
+from app.request_timing import TimedRoute
 
-router = APIRouter(prefix="/api/family", tags=["family"])
+router = APIRouter(prefix="/api/family", tags=["family"], route_class=TimedRoute)
 
 
 @router.get("", response_model=list[FamilyResponse])
@@ -21,9 +40,7 @@ def get_user_families(
     db: Session = Depends(get_db)
 ):
     """Get all families the current user belongs to"""
-    user_families = db.query(UserFamily).filter(UserFamily.user_id == current_user.id).all()
-    family_ids = [uf.family_id for uf in user_families]
-    families = db.query(Family).filter(Family.id.in_(family_ids)).all()
+    families = load_user_families(db, current_user.id)
     return [FamilyResponse.model_validate(f) for f in families]
 
 
@@ -33,15 +50,7 @@ def check_family_exists(
     db: Session = Depends(get_db)
 ):
     """Check if a family exists (case-insensitive)"""
-    from sqlalchemy import func
-    
-    normalized_name = family_name.lower()
-    
-    # Try exact match first
-    family = db.query(Family).filter(Family.name == family_name).first()
-    if not family:
-        # Try case-insensitive match
-        family = db.query(Family).filter(func.lower(Family.name) == normalized_name).first()
+    family = find_family_by_name(db, family_name)
     
     return {
         "exists": family is not None,
@@ -56,32 +65,20 @@ def create_family(
     db: Session = Depends(get_db)
 ):
     """Create a new family and automatically join it (case-insensitive check)"""
-    from sqlalchemy import func
-    
-    # Normalize family name for case-insensitive matching
-    normalized_name = family_data.name.lower()
-    
-    # Check if family already exists (case-insensitive)
-    existing_family = db.query(Family).filter(Family.name == family_data.name).first()
-    if not existing_family:
-        existing_family = db.query(Family).filter(func.lower(Family.name) == normalized_name).first()
-    
-    if existing_family:
+    # Insert only if no family with this name exists in any case
+    family = insert_family_if_absent(db, family_data.name)
+    if not family:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Family with this name already exists"
         )
     
-    # Create family
-    family = Family(name=family_data.name)
-    db.add(family)
-    db.flush()
-    
     # Join the family
     user_family = UserFamily(user_id=current_user.id, family_id=family.id)
     db.add(user_family)
     db.commit()
     db.refresh(family)
+    invalidate_family_roster(family.id)
     
     return FamilyResponse.model_validate(family)
 
@@ -113,6 +110,7 @@ def join_family(
     user_family = UserFamily(user_id=current_user.id, family_id=family_id)
     db.add(user_family)
     db.commit()
+    invalidate_family_roster(family_id)
     
     return FamilyResponse.model_validate(family)
 
@@ -124,23 +122,8 @@ def join_family_by_name(
     db: Session = Depends(get_db)
 ):
     """Join a family by name, creating it if it doesn't exist (case-insensitive)"""
-    from sqlalchemy import func
-    
-    # Normalize family name for case-insensitive matching
-    normalized_name = family_data.name.lower()
-    
-    # Check if family exists (case-insensitive)
-    # First try exact match
-    family = db.query(Family).filter(Family.name == family_data.name).first()
-    if not family:
-        # Try case-insensitive match
-        family = db.query(Family).filter(func.lower(Family.name) == normalized_name).first()
-    
-    if not family:
-        # Create family if it doesn't exist (use the exact name provided)
-        family = Family(name=family_data.name)
-        db.add(family)
-        db.flush()
+    # Resolve the family, creating it with the exact name provided if needed
+    family, _ = resolve_or_create_family(db, family_data.name)
     
     # Check if user is already a member
     existing_membership = db.query(UserFamily).filter(
@@ -155,6 +138,7 @@ def join_family_by_name(
     db.add(user_family)
     db.commit()
     db.refresh(family)
+    invalidate_family_roster(family.id)
     
     return FamilyResponse.model_validate(family)
 
@@ -166,31 +150,23 @@ def get_family_members(
     db: Session = Depends(get_db)
 ):
     """Get all members of a family (only if current user is a member)"""
-    # Verify user is a member of this family
-    user_family = db.query(UserFamily).filter(
-        UserFamily.user_id == current_user.id,
-        UserFamily.family_id == family_id
-    ).first()
+    roster = get_family_roster(db, family_id, expect_member=current_user.id)
     
-    if not user_family:
+    # Verify user is a member of this family
+    if not find_member(roster, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a member of this family"
         )
     
-    # Get all members
-    user_families = db.query(UserFamily).filter(UserFamily.family_id == family_id).all()
-    user_ids = [uf.user_id for uf in user_families]
-    users = db.query(User).filter(User.id.in_(user_ids)).all()
-    
     return [
         {
-            "id": str(user.id),
-            "username": user.username,
-            "full_name": user.full_name,
-            "email": user.email
+            "id": str(member.id),
+            "username": member.username,
+            "full_name": member.full_name,
+            "email": member.email
         }
-        for user in users
+        for member in roster
     ]
 
 
@@ -199,6 +175,16 @@ class GroqApiKeyRequest(BaseModel):
     date: Optional[str] = None  # Format: YYYY-MM-DD
 
 
+def _parse_summary_date(value: Optional[str]) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else date.today()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format, expected YYYY-MM-DD"
+        )
+
+
 class FamilySummaryResponse(BaseModel):
     summary: str
     total_posts: int
@@ -230,53 +216,7 @@ def get_family_summary(
     try:
         # Parse date or use today
         target_date = datetime.strptime(request.date, "%Y-%m-%d").date() if request.date else date.today()
-        start_datetime = datetime.combine(target_date, datetime.min.time())
-        end_datetime = datetime.combine(target_date, datetime.max.time())
-        
-        # Get all posts from the day in the current family
-        posts = db.query(Post).filter(
-            and_(
-                Post.family_id == family_id,
-                Post.created_at >= start_datetime,
-                Post.created_at <= end_datetime
-            )
-        ).order_by(Post.created_at.desc()).all()
-        
-        # Get all users in this family
-        user_families = db.query(UserFamily).filter(UserFamily.family_id == family_id).all()
-        user_ids = [uf.user_id for uf in user_families]
-        users = db.query(User).filter(User.id.in_(user_ids)).all()
-        
-        # Format posts for LLM
-        posts_data = []
-        for post in posts:
-            posts_data.append({
-                "id": str(post.id),
-                "content": post.content,
-                "user": {
-                    "id": str(post.user_id),
-                    "username": post.user.username
-                },
-                "created_at": post.created_at.isoformat()
-            })
-        
-        users_data = [{"id": str(u.id), "username": u.username} for u in users]
-        
-        # Initialize LLM service
-        llm_service = GroqLLMService(request.groq_api_key)
-        
-        # Generate summary
-        summary = llm_service.generate_family_summary(posts_data, users_data)
-        
-        # Get unique active users
-        active_user_ids = set(post.user_id for post in posts)
-        
-        return FamilySummaryResponse(
-            summary=summary,
-            total_posts=len(posts),
-            date=target_date.isoformat(),
-            users_active=len(active_user_ids)
-        )
+        return FamilySummaryResponse(**build_family_summary(db, family_id, target_date, request.groq_api_key))
         
     except Exception as e:
         raise HTTPException(
@@ -299,20 +239,14 @@ def get_user_summary(
     Sentiment is returned as free text description (not a score)
     """
     try:
-        # Verify user exists and is in the same family
-        target_user = db.query(User).filter(User.id == user_id).first()
-        if not target_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Verify target user is in the same family
-        target_user_family = db.query(UserFamily).filter(
-            UserFamily.user_id == user_id,
-            UserFamily.family_id == family_id
-        ).first()
-        if not target_user_family:
+        target_user = find_member(get_family_roster(db, family_id, expect_member=user_id), user_id)
+        if not target_user:
+            if not db.query(User.id).filter(User.id == user_id).first():
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="User is not a member of this family"
@@ -320,69 +254,9 @@ def get_user_summary(
         
         # Parse date or use today
         target_date = datetime.strptime(request.date, "%Y-%m-%d").date() if request.date else date.today()
-        start_datetime = datetime.combine(target_date, datetime.min.time())
-        end_datetime = datetime.combine(target_date, datetime.max.time())
-        
-        # Get user's posts from the day in this family
-        user_posts = db.query(Post).filter(
-            and_(
-                Post.family_id == family_id,
-                Post.user_id == user_id,
-                Post.created_at >= start_datetime,
-                Post.created_at <= end_datetime
-            )
-        ).order_by(Post.created_at.desc()).all()
-        
-        # Get messages between current user and target user from the day in this family
-        messages = db.query(Message).filter(
-            and_(
-                Message.family_id == family_id,
-                Message.created_at >= start_datetime,
-                Message.created_at <= end_datetime,
-                (
-                    (Message.sender_id == current_user.id and Message.recipient_id == user_id) |
-                    (Message.sender_id == user_id and Message.recipient_id == current_user.id)
-                )
-            )
-        ).order_by(Message.created_at.desc()).all()
-        
-        # Format data for LLM
-        posts_data = [{
-            "id": str(p.id),
-            "content": p.content,
-            "created_at": p.created_at.isoformat()
-        } for p in user_posts]
-        
-        messages_data = [{
-            "id": str(m.id),
-            "content": m.content,
-            "sender_id": str(m.sender_id),
-            "created_at": m.created_at.isoformat()
-        } for m in messages]
-        
-        # Initialize LLM service
-        llm_service = GroqLLMService(request.groq_api_key)
-        
-        # Generate summary and sentiment
-        result = llm_service.generate_user_summary(posts_data, messages_data)
-        
-        # Add message analysis if messages exist
-        messages_with_you = None
-        if messages:
-            messages_with_you = {
-                "count": len(messages),
-                "summary": f"You exchanged {len(messages)} messages today."
-            }
-        
-        return UserSummaryResponse(
-            user_id=user_id,
-            username=target_user.username,
-            date=target_date.isoformat(),
-            post_summary=result["post_summary"],
-            sentiment=result["sentiment"],
-            posts_count=len(user_posts),
-            messages_with_you=messages_with_you
-        )
+        return UserSummaryResponse(**build_user_summary(
+            db, family_id, current_user.id, target_user, target_date, request.groq_api_key
+        ))
         
     except HTTPException:
         raise
@@ -392,3 +266,268 @@ def get_user_summary(
             detail=f"Error generating user summary: {str(e)}"
         )
 
+
+
+class MemberSummary(BaseModel):
+    user_id: UUID
+    username: str
+    status: Literal["stored", "generated", "timeout", "error"]
+    post_summary: Optional[str] = None
+    sentiment: Optional[str] = None
+    posts_count: int
+    messages_with_you: Optional[dict] = None
+
+
+class MemberSummariesResponse(BaseModel):
+    date: str
+    complete: bool  # False if some members timed out
+    members: List[MemberSummary]
+
+
+def _generate_member_summary(
+    llm_service: GroqLLMService,
+    key: SummaryKey,
+    fingerprint: str,
+    posts_data: List[dict],
+    messages_data: List[dict]
+) -> dict:
+    """Runs on a worker thread; stores with its own session so late results are kept"""
+    result = llm_service.summarize_user(posts_data, messages_data)
+    db = SessionLocal()
+    try:
+        save_summary(db, key, fingerprint, result)
+    finally:
+        db.close()
+    return result
+
+
+@router.post("/summary/members", response_model=MemberSummariesResponse)
+def get_member_summaries(
+    request: GroqApiKeyRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    family_id: UUID = Depends(get_current_family_id)
+):
+    """
+    Daily summary and sentiment for every family member in one request
+    
+    Every member's post and message counts are aggregated in one query;
+    stored summaries are reused, and the posts and messages of the rest are
+    loaded together and their summaries generated
+    concurrently (SUMMARY_CONCURRENCY at a time, on the shared LLM task
+    pool). Members still pending after SUMMARY_TIMEOUT_SECONDS are returned
+    with status "timeout"; summaries already started are stored when they
+    finish, so a retry picks them up.
+    """
+    target_date = _parse_summary_date(request.date)
+    roster = get_family_roster(db, family_id)
+    
+    # Every member's post and message counts and digests in one query
+    day_stats = load_member_day_stats(db, family_id, current_user.id, target_date)
+    keys = {}
+    for member in roster:
+        key = SummaryKey(
+            "user", family_id, target_date, GroqLLMService.model,
+            subject_id=member.id, viewer_id=current_user.id
+        )
+        keys[key] = user_fingerprint(day_stats.get(member.id, MemberDayStats()))
+    stored = load_member_summaries(db, keys)
+    
+    # Posts and messages are only loaded for the members still to generate
+    missing = [key for key in keys if key not in stored]
+    posts_by_member, messages_by_member = (
+        load_member_day_items(db, family_id, current_user.id, target_date, [key.subject_id for key in missing])
+        if missing else ({}, {})
+    )
+    
+    results = {key.subject_id: ("stored", stored[key]) for key in stored}
+    pending = {}
+    llm_service = None
+    deadline = time.monotonic() + settings.SUMMARY_TIMEOUT_SECONDS
+    # Members run on the shared LLM task pool, at most SUMMARY_CONCURRENCY
+    # of this request's at a time; a slot frees when its member finishes
+    slots = threading.BoundedSemaphore(max(1, settings.SUMMARY_CONCURRENCY))
+    for key in missing:
+        if not slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            break  # Out of time; the rest are returned as timeouts
+        llm_service = llm_service or GroqLLMService(request.groq_api_key)
+        posts_data, messages_data = user_llm_args(
+            posts_by_member.get(key.subject_id, []), messages_by_member.get(key.subject_id, [])
+        )
+        future = submit_llm_task(_generate_member_summary, llm_service, key, keys[key], posts_data, messages_data)
+        future.add_done_callback(lambda _: slots.release())
+        pending[future] = key.subject_id
+    
+    # Stragglers aren't waited for; they finish (and store) in the background
+    done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()))
+    for future in done:
+        try:
+            results[pending[future]] = ("generated", future.result())
+        except Exception as e:
+            results[pending[future]] = ("error", {
+                "post_summary": f"Error analyzing: {str(e)}",
+                "sentiment": "Unable to analyze sentiment at this time."
+            })
+    if len(done) < len(missing):
+        metrics.incr("summary.members.timeouts", len(missing) - len(done))
+    
+    members = []
+    for member in roster:
+        member_status, result = results.get(member.id, ("timeout", {}))
+        stats = day_stats.get(member.id, MemberDayStats())
+        members.append(MemberSummary(
+            user_id=member.id,
+            username=member.username,
+            status=member_status,
+            post_summary=result.get("post_summary"),
+            sentiment=result.get("sentiment"),
+            posts_count=stats.posts,
+            messages_with_you=user_messages_with_you(stats)
+        ))
+    
+    return MemberSummariesResponse(
+        date=target_date.isoformat(),
+        complete=all(m.status != "timeout" for m in members),
+        members=members
+    )
+
+
+class SummaryJobRequest(GroqApiKeyRequest):
+    user_id: Optional[UUID] = None  # Member to summarize; omit for the family summary
+
+
+class SummaryJobResponse(BaseModel):
+    job_id: UUID
+    kind: str
+    status: str  # queued, running, done or failed
+    date: str
+    result: Optional[dict] = None  # FamilySummaryResponse or UserSummaryResponse fields
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+def _job_response(job: SummaryJob) -> SummaryJobResponse:
+    return SummaryJobResponse(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        date=job.summary_date.isoformat(),
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
+
+@router.post("/summary/jobs", response_model=SummaryJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_summary_job(
+    request: SummaryJobRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    family_id: UUID = Depends(get_current_family_id)
+):
+    """
+    Queue a family summary (or a member's summary with user_id) and return
+    immediately; poll GET /api/family/summary/jobs/{job_id} for the result.
+    The API key is held in memory only until the job runs.
+    """
+    if settings.SUMMARY_WORKERS <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Summary jobs are disabled on this server"
+        )
+    target_date = _parse_summary_date(request.date)
+    
+    if request.user_id and not find_member(get_family_roster(db, family_id, expect_member=request.user_id), request.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is not a member of this family"
+        )
+    
+    job = submit_job(
+        db,
+        kind="user" if request.user_id else "family",
+        family_id=family_id,
+        requested_by=current_user.id,
+        api_key=request.groq_api_key,
+        summary_date=target_date,
+        subject_id=request.user_id
+    )
+    return _job_response(job)
+
+
+@router.get("/summary/jobs/{job_id}", response_model=SummaryJobResponse)
+def get_summary_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Status and, once done, result of a summary job you submitted"""
+    job = db.query(SummaryJob).filter(
+        SummaryJob.id == job_id,
+        SummaryJob.requested_by == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Summary job not found"
+        )
+    return _job_response(job)
+
+
+def _event_stream(events) -> StreamingResponse:
+    """Relay (event, data) pairs as Server-Sent Events"""
+    def body():
+        for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/summary/stream")
+def stream_family_summary_events(
+    request: GroqApiKeyRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    family_id: UUID = Depends(get_current_family_id)
+):
+    """
+    Streaming variant of POST /api/family/summary (text/event-stream)
+    
+    Events: `token` ({"text"}) as the summary is generated, then `done` with
+    the FamilySummaryResponse fields, or `error` ({"detail"}).
+    """
+    target_date = _parse_summary_date(request.date)
+    return _event_stream(stream_family_summary(db, family_id, target_date, request.groq_api_key))
+
+
+@router.post("/users/{user_id}/summary/stream")
+def stream_user_summary_events(
+    user_id: UUID,
+    request: GroqApiKeyRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    family_id: UUID = Depends(get_current_family_id)
+):
+    """
+    Streaming variant of POST /api/family/users/{user_id}/summary (text/event-stream)
+    
+    Events: `post_summary` and `sentiment` ({"text"} deltas) as each section
+    is generated, then `done` with the UserSummaryResponse fields, or
+    `error` ({"detail"}).
+    """
+    target_user = find_member(get_family_roster(db, family_id, expect_member=user_id), user_id)
+    if not target_user:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is not a member of this family"
+        )
+    target_date = _parse_summary_date(request.date)
+    return _event_stream(stream_user_summary(
+        db, family_id, current_user.id, target_user, target_date, request.groq_api_key
+    ))
+
@@ -3,18 +3,19 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User, Message, UserFamily
 from app.schemas import MessageCreate, MessageResponse
 from app.auth import get_current_user, get_current_family_id
+from app.request_timing import TimedRoute
 
-router = APIRouter(prefix="/api/messages", tags=["messages"])
+router = APIRouter(prefix="/api/messages", tags=["messages"], route_class=TimedRoute)
 
 
 @router.get("", response_model=list[MessageResponse])
 def get_conversations(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     family_id: UUID = Depends(get_current_family_id)
 ):
     # Get all unique conversations (users who sent or received messages) in this family
@@ -3,17 +3,19 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User, Post, PostReaction, ReactionType
 from app.schemas import PostCreate, PostUpdate, PostResponse, ReactionResponse
 from app.auth import get_current_user, get_current_family_id
+from app.services.search_cache import bump_search_version
+from app.request_timing import TimedRoute
 
-router = APIRouter(prefix="/api/posts", tags=["posts"])
+router = APIRouter(prefix="/api/posts", tags=["posts"], route_class=TimedRoute)
 
 
 @router.get("", response_model=list[PostResponse])
 def get_posts(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 50,
     family_id: UUID = Depends(get_current_family_id)
@@ -55,6 +57,7 @@ def create_post(
         content=post_data.content
     )
     db.add(db_post)
+    bump_search_version(db, family_id)
     db.commit()
     db.refresh(db_post)
     return db_post
@@ -85,6 +88,7 @@ def update_post(
         )
     
     post.content = post_data.content
+    bump_search_version(db, family_id)
     db.commit()
     db.refresh(post)
     return post
@@ -114,6 +118,7 @@ def delete_post(
         )
     
     db.delete(post)
+    bump_search_version(db, family_id)
     db.commit()
     return None
 
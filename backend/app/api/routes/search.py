@@ -1,36 +1,307 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-
-from app.database import get_db
-from app.models import Post
-from app.schemas import PostResponse, SearchResponse
-from app.auth import get_current_family_id
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Float, cast, func, literal, null, select, or_, tuple_
+
+from app.config import settings
+from app.database import get_read_db
+from app.models import User, Post, Comment, Message, Family, UserFamily
+from app.schemas import (
+    PostSearchResult, SearchResponse, SearchResultItem, UnifiedSearchResponse,
+    PostResponse, CommentResponse, MessageResponse,
+    TypeaheadMember, TypeaheadFamily, TypeaheadResponse
+)
+from app.auth import get_current_user, get_current_family_id
+from app.services.search_service import (
+    build_tsquery, tsquery, headline, like_pattern, substring_snippet, count_total,
+    encode_cursor, decode_cursor, prefix_pattern, EXHAUSTED_CURSOR
+)
+from app.services.search_cache import (
+    CachedSearch, SearchHit, search_cache, normalize_query, get_search_version, hydrate_posts
+)
+from app.request_timing import TimedRoute
 from uuid import UUID
 
-router = APIRouter(prefix="/api/search", tags=["search"])
+router = APIRouter(prefix="/api/search", tags=["search"], route_class=TimedRoute)
+
+
+def _run_search(
+    db: Session,
+    q: str,
+    mode: str,
+    total_mode: str,
+    skip: int,
+    limit: int,
+    family_id: UUID
+) -> CachedSearch:
+    """Execute a search and return the page as post ids with ranks and snippets"""
+    if mode == "fulltext":
+        ts_query = tsquery(build_tsquery(q))
+        rank = func.ts_rank_cd(Post.search_vector, ts_query)
+        match = Post.search_vector.op("@@")(ts_query)
+    elif mode == "substring":
+        rank = null()
+        match = Post.content.ilike(like_pattern(q))
+    else:
+        # <% uses the trigram index with the threshold set for this transaction
+        db.execute(select(
+            func.set_config("pg_trgm.word_similarity_threshold", str(settings.SEARCH_FUZZY_THRESHOLD), True)
+        ))
+        rank = func.word_similarity(q, Post.content)
+        match = literal(q).op("<%")(Post.content)
+    
+    filters = [Post.family_id == family_id, match]
+    order_by = [Post.created_at.desc()] if mode == "substring" else [rank.desc(), Post.created_at.desc()]
+    rows = db.query(Post.id, rank).filter(*filters).order_by(*order_by).offset(skip).limit(limit).all()
+    
+    if len(rows) < limit and (rows or skip == 0):
+        # Short page: the page itself tells us the exact total, no count needed
+        total, total_is_lower_bound, total_is_estimate = skip + len(rows), False, False
+    else:
+        total, total_is_lower_bound, total_is_estimate = count_total(
+            db, db.query(Post.id).filter(*filters), total_mode, max(settings.SEARCH_TOTAL_CAP, skip + limit)
+        )
+        # Planner estimates can undershoot what we already know exists
+        total = max(total, skip + len(rows))
+    
+    # Highlight only the returned page; ts_headline re-parses each document
+    snippets = {}
+    if rows and mode == "fulltext":
+        snippets = dict(
+            db.query(Post.id, headline(Post.content, ts_query))
+            .filter(Post.id.in_([post_id for post_id, _ in rows]))
+            .all()
+        )
+    
+    return CachedSearch(
+        hits=tuple(SearchHit(post_id, post_rank, snippets.get(post_id)) for post_id, post_rank in rows),
+        total=total,
+        total_is_lower_bound=total_is_lower_bound,
+        total_is_estimate=total_is_estimate
+    )
 
 
 @router.get("", response_model=SearchResponse)
 def search_posts(
-    q: str = Query(..., min_length=1),
-    db: Session = Depends(get_db),
+    q: str = Query(..., min_length=1, description='Words, "phrases", prefix*, -excluded, a OR b'),
+    mode: Literal["fulltext", "substring", "fuzzy"] = "fulltext",
+    total_mode: Literal["exact", "capped", "estimated"] = "capped",
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 50,
     family_id: UUID = Depends(get_current_family_id)
 ):
-    if not q:
+    """
+    Search posts in the active family.
+
+    Modes:
+    - fulltext: indexed full-text search ranked by relevance, newest first among equal ranks
+    - substring: case-insensitive '%q%' match served by the trigram index, newest first
+    - fuzzy: trigram word similarity (names, misspellings), most similar first
+
+    total_mode controls how `total` is computed: exact count, capped at
+    SEARCH_TOTAL_CAP (default), or estimated from planner statistics.
+
+    Result pages are cached per family and normalized query until the next
+    post write in the family.
+    """
+    if mode == "fulltext" and not build_tsquery(q):
         return SearchResponse(posts=[], total=0)
     
-    # Use PostgreSQL full-text search, filtered by family
-    search_term = f"%{q.lower()}%"
-    query = db.query(Post).filter(
-        Post.family_id == family_id,
-        func.lower(Post.content).like(search_term)
+    cache_key = (
+        family_id, get_search_version(db, family_id),
+        mode, normalize_query(q, mode), total_mode, skip, limit
     )
+    result = search_cache.get(cache_key)
+    if result is None:
+        result = _run_search(db, q, mode, total_mode, skip, limit, family_id)
+        search_cache.put(cache_key, result)
+    
+    posts_by_id = hydrate_posts(db, [hit.post_id for hit in result.hits])
+    posts = []
+    for hit in result.hits:
+        post = posts_by_id.get(hit.post_id)
+        if post is None:
+            continue
+        snippet = substring_snippet(post.content, q) if mode == "substring" else hit.snippet
+        posts.append(PostSearchResult.model_validate(post).model_copy(
+            update={"rank": hit.rank, "snippet": snippet}
+        ))
     
-    total = query.count()
-    posts = query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    return SearchResponse(
+        posts=posts,
+        total=result.total,
+        total_is_lower_bound=result.total_is_lower_bound,
+        total_is_estimate=result.total_is_estimate
+    )
+
+
+SEARCH_SOURCES = {
+    "post": (Post, Post.user, PostResponse),
+    "comment": (Comment, Comment.user, CommentResponse),
+    "message": (Message, Message.sender, MessageResponse),
+}
+
+
+def _source_query(db: Session, search_type: str, ts_query, family_id: UUID, user_id: UUID):
+    """Indexed full-text match for one entity type, scoped to what the caller may see"""
+    model = SEARCH_SOURCES[search_type][0]
+    # double precision end to end: the real from ts_rank_cd would be widened
+    # (0.1 -> 0.10000000149) when compared with the cursor's rank
+    rank = cast(func.ts_rank_cd(model.search_vector, ts_query), Float(53))
+    query = db.query(model.id, rank, model.created_at).filter(model.search_vector.op("@@")(ts_query))
     
-    return SearchResponse(posts=posts, total=total)
+    if search_type == "post":
+        query = query.filter(Post.family_id == family_id)
+    elif search_type == "comment":
+        query = query.join(Post, Comment.post_id == Post.id).filter(Post.family_id == family_id)
+    else:
+        # Only conversations the caller is part of
+        query = query.filter(
+            Message.family_id == family_id,
+            or_(Message.sender_id == user_id, Message.recipient_id == user_id)
+        )
+    return model, rank, query
+
+
+@router.get("/all", response_model=UnifiedSearchResponse)
+def search_all(
+    q: str = Query(..., min_length=1, description='Words, "phrases", prefix*, -excluded, a OR b'),
+    types: List[Literal["post", "comment", "message"]] = Query(["post", "comment", "message"]),
+    post_cursor: Optional[str] = None,
+    comment_cursor: Optional[str] = None,
+    message_cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    family_id: UUID = Depends(get_current_family_id)
+):
+    """
+    Full-text search across posts, comments and the caller's own messages.
+
+    Each type is matched through its GIN-indexed search vector and paged with
+    its own keyset cursor; the pages are merged by rank (newest first among
+    equal ranks). To continue, pass back the returned cursor of every type:
+    an empty or missing cursor starts that type from the top, and "end"
+    (EXHAUSTED_CURSOR) marks a type with no further results, which is
+    skipped.
+    """
+    query_text = build_tsquery(q)
+    if not query_text:
+        return UnifiedSearchResponse(results=[], cursors={t: EXHAUSTED_CURSOR for t in types})
+    ts_query = tsquery(query_text)
+    
+    incoming = {"post": post_cursor, "comment": comment_cursor, "message": message_cursor}
+    candidates = []
+    has_more = {}
+    for search_type in dict.fromkeys(types):
+        if incoming[search_type] == EXHAUSTED_CURSOR:
+            has_more[search_type] = False
+            continue
+        model, rank, query = _source_query(db, search_type, ts_query, family_id, current_user.id)
+        if incoming[search_type]:
+            try:
+                position = decode_cursor(incoming[search_type])
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid {search_type}_cursor"
+                )
+            cursor_rank, cursor_created_at, cursor_id = position
+            query = query.filter(
+                tuple_(rank, model.created_at, model.id)
+                < tuple_(cast(cursor_rank, Float(53)), cursor_created_at, cursor_id)
+            )
+        rows = query.order_by(rank.desc(), model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+        has_more[search_type] = len(rows) > limit
+        candidates.extend((search_type, row_id, row_rank, created_at) for row_id, row_rank, created_at in rows[:limit])
+    
+    candidates.sort(key=lambda c: (c[2], c[3], c[1]), reverse=True)
+    page = candidates[:limit]
+    
+    # Load the page per type with snippets and authors, one query per type
+    loaded = {}
+    for search_type in {c[0] for c in page}:
+        model, author, _ = SEARCH_SOURCES[search_type]
+        ids = [c[1] for c in page if c[0] == search_type]
+        rows = (
+            db.query(model, headline(model.content, ts_query))
+            .options(joinedload(author))
+            .filter(model.id.in_(ids))
+            .all()
+        )
+        loaded.update({(search_type, obj.id): (obj, snippet) for obj, snippet in rows})
+    
+    results = []
+    for search_type, row_id, row_rank, created_at in page:
+        if (search_type, row_id) not in loaded:
+            continue
+        obj, snippet = loaded[(search_type, row_id)]
+        response_model = SEARCH_SOURCES[search_type][2]
+        results.append(SearchResultItem(
+            type=search_type,
+            id=row_id,
+            rank=row_rank,
+            created_at=created_at,
+            snippet=snippet,
+            **{search_type: response_model.model_validate(obj)}
+        ))
+    
+    cursors = {}
+    for search_type in dict.fromkeys(types):
+        consumed = [c for c in page if c[0] == search_type]
+        fetched = sum(1 for c in candidates if c[0] == search_type)
+        if len(consumed) == fetched and not has_more[search_type]:
+            cursors[search_type] = EXHAUSTED_CURSOR
+        elif consumed:
+            _, row_id, row_rank, created_at = consumed[-1]
+            cursors[search_type] = encode_cursor(row_rank, created_at, row_id)
+        else:
+            cursors[search_type] = incoming[search_type] or ""
+    
+    return UnifiedSearchResponse(results=results, cursors=cursors)
+
+
+@router.get("/typeahead", response_model=TypeaheadResponse)
+def typeahead(
+    q: str = Query(..., min_length=1, max_length=100),
+    k: int = Query(8, ge=1, le=25),
+    db: Session = Depends(get_read_db),
+    family_id: UUID = Depends(get_current_family_id)
+):
+    """
+    Prefix suggestions for member pickers and the join-family box.
+
+    Returns up to k members of the active family whose username or full name
+    starts with q, and up to k families whose name starts with q
+    (case-insensitive), served from lower(column) prefix indexes.
+    """
+    if not q.strip():
+        return TypeaheadResponse(members=[], families=[])
+    pattern = prefix_pattern(q.strip())
+    
+    members = (
+        db.query(User.id, User.username, User.full_name)
+        .join(UserFamily, UserFamily.user_id == User.id)
+        .filter(
+            UserFamily.family_id == family_id,
+            or_(func.lower(User.username).like(pattern), func.lower(User.full_name).like(pattern))
+        )
+        .order_by(User.username)
+        .limit(k)
+        .all()
+    )
+    
+    families = (
+        db.query(Family.id, Family.name)
+        .filter(func.lower(Family.name).like(pattern))
+        .order_by(func.lower(Family.name))
+        .limit(k)
+        .all()
+    )
+    
+    return TypeaheadResponse(
+        members=[TypeaheadMember(id=m.id, username=m.username, full_name=m.full_name) for m in members],
+        families=[TypeaheadFamily(id=f.id, name=f.name) for f in families]
+    )
 
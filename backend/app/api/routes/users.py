@@ -2,18 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User, Post
 from app.schemas import UserResponse, UserUpdate, PostResponse
 from app.auth import get_current_user
+from app.request_timing import TimedRoute
 
-router = APIRouter(prefix="/api/users", tags=["users"])
+router = APIRouter(prefix="/api/users", tags=["users"], route_class=TimedRoute)
 
 
 @router.get("", response_model=list[UserResponse])
 def get_all_users(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100
 ):
@@ -23,7 +24,7 @@ def get_all_users(
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: UUID, db: Session = Depends(get_db)):
+def get_user(user_id: UUID, db: Session = Depends(get_read_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
@@ -34,7 +35,7 @@ def get_user(user_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}/posts", response_model=list[PostResponse])
-def get_user_posts(user_id: UUID, db: Session = Depends(get_db), skip: int = 0, limit: int = 50):
+def get_user_posts(user_id: UUID, db: Session = Depends(get_read_db), skip: int = 0, limit: int = 50):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
@@ -2,13 +2,13 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_route_db
 from app.models import User, Family, UserFamily
 from app.schemas import TokenData
 
@@ -45,7 +45,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_token_subject(request: Request) -> Optional[str]:
+    """Get the user id from the bearer token without a database lookup (None if absent or invalid)"""
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_route_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -73,7 +86,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 def get_current_family_id(
     token: str = Depends(oauth2_scheme),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_route_db)
 ) -> UUID:
     """Get the active family_id from JWT token and verify user belongs to it"""
     credentials_exception = HTTPException(
@@ -113,7 +126,7 @@ def get_current_family_id(
 
 def get_current_family(
     family_id: UUID = Depends(get_current_family_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_route_db)
 ) -> Family:
     """Get the active family from family_id"""
     family = db.query(Family).filter(Family.id == family_id).first()
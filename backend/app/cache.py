@@ -0,0 +1,75 @@
+# In-process LRU cache with TTL and metrics
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from app.metrics import metrics
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    Hits, misses and evictions are counted under `<name>.hits` etc., and
+    `<name>.entries` / `<name>.hit_rate` gauges are registered on creation.
+    A max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        metrics.gauge(f"{name}.entries", lambda: len(self))
+        metrics.gauge(f"{name}.hit_rate", self.hit_rate)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                metrics.incr(f"{self.name}.misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr(f"{self.name}.hits")
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.incr(f"{self.name}.evictions")
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge_expired(self):
+        """Drop expired entries now rather than on their next lookup"""
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0] < now]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def hit_rate(self) -> float:
+        hits = metrics.counter(f"{self.name}.hits")
+        lookups = hits + metrics.counter(f"{self.name}.misses")
+        return hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -6,11 +8,95 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    
+
+    # Database connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_SLOW_CHECKOUT_MS: int = 100  # Log checkouts that wait longer than this
+    # Transaction-pooling safe mode for running behind pgbouncer
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Optional read replica for read-only endpoints
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # Read from primary this long after a user's own write; at least DB_REPLICA_MAX_LAG_SECONDS,
+    # or a replica within its allowed lag could miss the write
+    DB_REPLICA_STICKY_SECONDS: float = 10.0
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10.0  # Fall back to primary above this lag
+    DB_REPLICA_CHECK_INTERVAL: int = 5  # Seconds between replica health checks
+
+    # Search
+    SEARCH_FUZZY_THRESHOLD: float = 0.5  # pg_trgm word similarity cutoff for mode=fuzzy
+    SEARCH_TOTAL_CAP: int = 1000  # Stop counting matches here for total_mode=capped
+    SEARCH_CACHE_SIZE: int = 1024  # Cached result pages per worker (0 disables the cache)
+    SEARCH_CACHE_TTL_SECONDS: int = 300
+
+    # Family member roster cache (per worker; invalidated locally on join)
+    ROSTER_CACHE_SIZE: int = 1024
+    ROSTER_CACHE_TTL_SECONDS: int = 300
+
+    # Bearer token for GET /metrics; unset, the endpoint is disabled
+    METRICS_TOKEN: Optional[str] = None
+
+    # Request timing (Server-Timing header and a log line per request)
+    REQUEST_SLOW_MS: float = 1000  # Log slower requests at WARNING with their SQL (0 disables)
+    REQUEST_SLOW_MAX_STATEMENTS: int = 50  # SQL statements kept per request for that log
+
+    # LLM backend: "groq", or "fake" for a local deterministic stand-in (offline use, benchmarks)
+    LLM_BACKEND: str = "groq"
+    FAKE_LLM_LATENCY_MS: float = 300  # Fake backend time to first token
+    FAKE_LLM_TOKENS_PER_SECOND: float = 250  # Fake backend output rate (0 = instant)
+
+    # Groq API clients (shared per worker)
+    GROQ_BASE_URL: Optional[str] = None  # Override the API endpoint, e.g. a local stand-in
+    GROQ_CLIENT_CACHE_SIZE: int = 256  # Distinct API keys with a cached client
+    GROQ_CLIENT_TTL_SECONDS: int = 900  # Drop a key's client after this long unused
+    GROQ_HTTP_MAX_CONNECTIONS: int = 20  # Keep-alive connections shared by all clients
+
+    # LLM call resilience (per model, per worker)
+    LLM_CALL_DEADLINE_SECONDS: float = 30.0  # Overall deadline per LLM call, fallback included
+    LLM_HEDGE_PERCENTILE: float = 95  # Start the fallback once the primary exceeds this latency percentile (0 disables)
+    LLM_HEDGE_MIN_SECONDS: float = 1.0  # Never hedge earlier than this
+    LLM_HEDGE_DEFAULT_SECONDS: float = 8.0  # Hedge delay until enough latency samples exist
+    LLM_BREAKER_WINDOW_SECONDS: int = 60  # Rolling window of calls considered
+    LLM_BREAKER_MIN_CALLS: int = 5  # Calls in the window before the breaker can open
+    LLM_BREAKER_ERROR_RATE: float = 0.5  # Error rate that opens the breaker
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 15.0  # Successful calls slower than this count as errors
+    LLM_BREAKER_OPEN_SECONDS: int = 30  # Time open before a half-open trial call
+    LLM_CALL_THREADS: int = 32  # Threads running (hedged) LLM call attempts
+    LLM_TASK_THREADS: int = 16  # Threads running summary work that waits on LLM calls (member and chunk summaries)
+
+    # LLM summaries
+    SUMMARY_CONCURRENCY: int = 4  # Parallel LLM calls per member-summaries request
+    SUMMARY_TIMEOUT_SECONDS: float = 25.0  # Return partial member summaries after this
+    LLM_PROMPT_TOKEN_BUDGET: int = 6000  # Estimated prompt tokens for models not listed below
+    LLM_PROMPT_TOKEN_BUDGETS: Dict[str, int] = {  # Per model, JSON in the environment
+        "llama-3.3-70b-versatile": 6000,
+        "llama-3.1-8b-instant": 4000,
+    }
+    SUMMARY_CHUNK_TOKENS: int = 3000  # Posts per family summary call before map-reduce kicks in
+    SUMMARY_CHUNK_CACHE_SIZE: int = 2048  # Cached chunk summaries per worker (0 disables)
+    SUMMARY_CHUNK_CACHE_TTL_SECONDS: int = 86400
+    SUMMARY_WORKERS: int = 2  # Summary job worker threads per process (0 disables jobs)
+    SUMMARY_JOB_STALE_SECONDS: int = 600  # Requeue running jobs, fail orphaned queued jobs after this
+    # Nightly precompute of yesterday's family summaries (needs GROQ_API_KEY; -1 disables)
+    SUMMARY_PRECOMPUTE_HOUR: int = 3
+    GROQ_API_KEY: Optional[str] = None  # Server key for scheduled jobs; users' keys are never stored
+
+    @model_validator(mode="after")
+    def check_replica_windows(self):
+        if self.DB_REPLICA_STICKY_SECONDS < self.DB_REPLICA_MAX_LAG_SECONDS:
+            raise ValueError(
+                "DB_REPLICA_STICKY_SECONDS must be at least DB_REPLICA_MAX_LAG_SECONDS "
+                "so reads after a user's own write never go to a replica that may not have it yet"
+            )
+        return self
+
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
 settings = Settings()
-
@@ -1,18 +1,269 @@
-from sqlalchemy import create_engine
+import hashlib
+import hmac
+import logging
+import math
+import threading
+import time
+from typing import Dict, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.config import settings
+from app.metrics import metrics
 
-engine = create_engine(settings.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection.
+
+    Times the public Pool.connect(), which engine.connect() and sessions go
+    through, so no private pool internals are relied on. The wait includes
+    opening a new connection or pre-pinging an idle one, which the caller
+    waits for too.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            metrics.incr("db.pool.checkout_timeouts")
+            logger.warning(
+                "Database pool exhausted: no connection available after %ss "
+                "(size=%s, overflow=%s, in_use=%s)",
+                self.timeout(), self.size(), self.overflow(), self.checkedout()
+            )
+            raise
+        finally:
+            waited_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("db.pool.checkout_wait_ms", waited_ms)
+            if waited_ms > settings.DB_POOL_SLOW_CHECKOUT_MS:
+                metrics.incr("db.pool.slow_checkouts")
+                logger.warning("Slow database pool checkout: waited %.1fms", waited_ms)
+
+
+def _connect_args(database_url: str) -> dict:
+    """
+    Driver arguments for the configured mode.
+
+    pgbouncer in transaction pooling mode hands each transaction to an
+    arbitrary server connection, so named server-side prepared statements
+    must never be reused. psycopg2 never prepares server-side; psycopg 3
+    does so automatically after a few executions unless disabled.
+    """
+    if not settings.DB_PGBOUNCER_MODE:
+        return {}
+    driver = make_url(database_url).get_driver_name()
+    if driver == "psycopg":
+        return {"prepare_threshold": None}
+    return {}
+
+
+def create_pooled_engine(database_url: str):
+    """Create an engine using the pool settings from config"""
+    return create_engine(
+        database_url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(database_url),
+    )
+
+
+def register_pool_gauges(prefix: str, pooled_engine):
+    """Expose in-use/idle/overflow gauges for an engine's pool"""
+    pool = pooled_engine.pool
+    metrics.gauge(f"{prefix}.size", pool.size)
+    metrics.gauge(f"{prefix}.in_use", pool.checkedout)
+    metrics.gauge(f"{prefix}.idle", pool.checkedin)
+    metrics.gauge(f"{prefix}.overflow", lambda: max(pool.overflow(), 0))
+
+
+engine = create_pooled_engine(settings.DATABASE_URL)
+register_pool_gauges("db.pool", engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_pooled_engine(settings.DATABASE_REPLICA_URL)
+    register_pool_gauges("db.replica_pool", replica_engine)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+def _request_session(request: Request, attr: str, session_factory):
+    """
+    Open a session for the request, or reuse the one an earlier dependency
+    opened, so auth checks and the endpoint share one pool checkout. The
+    dependency that opened the session closes it.
+    """
+    db = getattr(request.state, attr, None)
+    if db is not None:
+        yield db
+        return
+    db = session_factory()
+    setattr(request.state, attr, db)
     try:
         yield db
     finally:
+        setattr(request.state, attr, None)
         db.close()
 
+
+def get_db(request: Request):
+    yield from _request_session(request, "db_session", SessionLocal)
+
+
+# Read replica routing
+
+# Replay lag in seconds; 0 when the replica has replayed everything it received
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_replica_state_lock = threading.Lock()
+_replica_state = {"healthy": False, "checked_at": 0.0}
+# Local fast path only: each worker sees just its own writes. Clients echo
+# WRITE_TOKEN_HEADER back so the window holds on every worker and instance.
+_recent_writers: Dict[str, float] = {}
+
+# Response header carrying a signed "<expires>.<signature>" after a write;
+# clients send it back on their next requests
+WRITE_TOKEN_HEADER = "X-DB-Write-Token"
+
+
+def _replica_is_healthy() -> bool:
+    """Check replica reachability and lag, caching the result for a few seconds"""
+    now = time.monotonic()
+    with _replica_state_lock:
+        if now - _replica_state["checked_at"] < settings.DB_REPLICA_CHECK_INTERVAL:
+            return _replica_state["healthy"]
+        # Claim the check so concurrent requests keep using the cached result
+        _replica_state["checked_at"] = now
+
+    try:
+        with replica_engine.connect() as conn:
+            lag = float(conn.execute(REPLICA_LAG_QUERY).scalar() or 0)
+        healthy = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            logger.warning("Read replica lagging by %.1fs, routing reads to primary", lag)
+    except Exception as e:
+        logger.warning("Read replica unavailable, routing reads to primary: %s", e)
+        healthy = False
+
+    with _replica_state_lock:
+        _replica_state["healthy"] = healthy
+    return healthy
+
+
+def _sign_write_token(key: str, expires: str) -> str:
+    message = f"{key}:{expires}".encode()
+    return hmac.new(settings.JWT_SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def mark_recent_write(key: str) -> str:
+    """
+    Pin a user's reads to the primary for the read-your-writes window.
+    Returns the write token to send in WRITE_TOKEN_HEADER.
+    """
+    now = time.monotonic()
+    with _replica_state_lock:
+        _recent_writers[key] = now + settings.DB_REPLICA_STICKY_SECONDS
+        if len(_recent_writers) > 1024:
+            for stale_key in [k for k, expires in _recent_writers.items() if expires <= now]:
+                del _recent_writers[stale_key]
+    expires = str(math.ceil(time.time() + settings.DB_REPLICA_STICKY_SECONDS))
+    return f"{expires}.{_sign_write_token(key, expires)}"
+
+
+def _has_write_token(key: str, token: Optional[str]) -> bool:
+    """Whether token is an unexpired write token issued to key (by any worker)"""
+    if not token:
+        return False
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) <= time.time():
+        return False
+    return hmac.compare_digest(signature, _sign_write_token(key, expires))
+
+
+def _is_recent_writer(key: Optional[str], write_token: Optional[str] = None) -> bool:
+    if not key:
+        return False
+    with _replica_state_lock:
+        expires = _recent_writers.get(key)
+    if expires is not None and expires > time.monotonic():
+        return True
+    return _has_write_token(key, write_token)
+
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints.
+
+    Uses the read replica when one is configured, healthy and not lagging,
+    unless the caller wrote recently (read-your-writes, from this worker's
+    own record or the client's write token). Otherwise falls back to the
+    primary.
+    """
+    use_replica = getattr(request.state, "db_use_replica", None)
+    if use_replica is None:
+        # Decided once per request, so every dependency reads from the same place
+        sticky_key = getattr(request.state, "db_sticky_key", None)
+        use_replica = (
+            ReplicaSessionLocal is not None
+            and not _is_recent_writer(sticky_key, request.headers.get(WRITE_TOKEN_HEADER))
+            and _replica_is_healthy()
+        )
+        request.state.db_use_replica = use_replica
+        metrics.incr("db.reads.replica" if use_replica else "db.reads.primary")
+
+    if use_replica:
+        yield from _request_session(request, "db_replica_session", ReplicaSessionLocal)
+    else:
+        # Same session as get_db, e.g. the one auth dependencies opened
+        yield from _request_session(request, "db_session", SessionLocal)
+
+
+_read_routes: Dict[int, bool] = {}  # id(route) -> _is_read_route; routes live as long as the app
+
+
+def _is_read_route(route) -> bool:
+    """Whether a route reads through get_read_db and never asks for the primary"""
+    read_only = _read_routes.get(id(route))
+    if read_only is None:
+        calls = set()
+        pending = [route.dependant]
+        while pending:
+            dependant = pending.pop()
+            calls.add(dependant.call)
+            pending.extend(dependant.dependencies)
+        read_only = _read_routes[id(route)] = get_read_db in calls and get_db not in calls
+    return read_only
+
+
+def get_route_db(request: Request):
+    """
+    Session for dependencies shared by all endpoints (authentication,
+    membership checks): the endpoint's read session on read-only routes,
+    the primary otherwise, so they never open a second session.
+    """
+    route = request.scope.get("route")
+    if getattr(route, "dependant", None) is not None and _is_read_route(route):
+        yield from get_read_db(request)
+    else:
+        yield from get_db(request)
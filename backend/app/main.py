@@ -1,13 +1,25 @@
+import hmac
+import json
+import logging
 import os
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.database import WRITE_TOKEN_HEADER, mark_recent_write
+from app.auth import get_token_subject
+from app.config import settings
+from app.metrics import metrics
+from app.request_timing import TimedRoute, reset_request_timing, start_request_timing
+from app.services.summary_jobs import worker_pool
+from app.services.llm_clients import groq_clients
 from app.api.routes import auth, users, posts, comments, search, messages, family
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic migrations (alembic upgrade head); startup runs no DDL
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Family Social Media API", version="1.0.0")
+app.router.route_class = TimedRoute
 
 # CORS middleware - supports both local and production
 allowed_origins = [
@@ -26,8 +38,94 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[WRITE_TOKEN_HEADER],
 )
 
+
+@app.middleware("http")
+async def replica_stickiness(request: Request, call_next):
+    """
+    Route a user's reads to the primary for a short window after their own
+    writes. Writes return a signed token in WRITE_TOKEN_HEADER; clients
+    echo it so the window holds across workers and instances. Endpoints
+    that write without a bearer token (signup) set db_sticky_key themselves.
+    """
+    request.state.db_sticky_key = get_token_subject(request)
+    response = await call_next(request)
+    if (
+        request.state.db_sticky_key
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        response.headers[WRITE_TOKEN_HEADER] = mark_recent_write(request.state.db_sticky_key)
+    return response
+
+
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """
+    Time each request: wall, SQL (time and query count), response
+    serialization and LLM calls. The Server-Timing header covers the work
+    done before the response starts; the log line is written once the body
+    has been sent, so streamed responses include their generation time.
+    Requests slower than REQUEST_SLOW_MS are logged at WARNING with their
+    SQL statements.
+    """
+    timing, token = start_request_timing()
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request_timing(token)
+    response.headers["Server-Timing"] = timing.server_timing()
+    route = request.scope.get("route")
+    body_iterator = response.body_iterator
+
+    async def timed_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            wall_ms = timing.wall_ms()
+            slow = settings.REQUEST_SLOW_MS > 0 and wall_ms >= settings.REQUEST_SLOW_MS
+            line = {
+                "method": request.method,
+                "route": getattr(route, "path", request.url.path),
+                "status": response.status_code,
+                "wall_ms": round(wall_ms, 1),
+                "db_ms": round(timing.ms["db"], 1),
+                "db_queries": timing.counts["db"],
+                "serialize_ms": round(timing.ms["serialize"], 1),
+                "llm_ms": round(timing.ms["llm"], 1),
+                "llm_calls": timing.counts["llm"],
+            }
+            metrics.observe("http.request_ms", wall_ms)
+            metrics.observe("http.db_queries", timing.counts["db"])
+            if slow:
+                metrics.incr("http.slow_requests")
+                line["sql"] = [{"ms": round(ms, 1), "statement": statement} for ms, statement in timing.statements]
+                logger.warning("Slow request %s", json.dumps(line))
+            else:
+                logger.info("Request %s", json.dumps(line))
+
+    response.body_iterator = timed_body()
+    return response
+
+
+@app.on_event("startup")
+def start_summary_workers():
+    worker_pool.start()
+
+
+@app.on_event("shutdown")
+def stop_summary_workers():
+    worker_pool.stop()
+
+
+@app.on_event("shutdown")
+def close_llm_clients():
+    groq_clients.close()
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -47,3 +145,21 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+
+def require_metrics_token(authorization: Optional[str] = Header(None)):
+    """/metrics exposes internals: disabled unless METRICS_TOKEN is set, then it must be the bearer token"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    """In-process counters, timers and gauges (database pool health, etc.)"""
+    return metrics.snapshot()
@@ -0,0 +1,65 @@
+# In-process metrics registry
+import threading
+from collections import defaultdict
+from typing import Callable, Dict
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe registry of counters, timers and gauges.
+
+    Counters and timers are accumulated in memory per worker process;
+    gauges are callables evaluated when a snapshot is taken.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timers: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] += value
+
+    def counter(self, name: str) -> float:
+        """Current value of a counter"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observe(self, name: str, value: float):
+        """Record a timing/size observation (count, total and max are kept)"""
+        with self._lock:
+            timer = self._timers.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timer["count"] += 1
+            timer["total"] += value
+            if value > timer["max"]:
+                timer["max"] = value
+
+    def gauge(self, name: str, fn: Callable[[], float]):
+        """Register a gauge evaluated lazily on snapshot"""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self) -> Dict:
+        """Return a JSON-serializable view of all metrics"""
+        with self._lock:
+            counters = dict(self._counters)
+            timers = {
+                name: {**timer, "avg": timer["total"] / timer["count"] if timer["count"] else 0.0}
+                for name, timer in self._timers.items()
+            }
+            gauges = dict(self._gauges)
+
+        gauge_values = {}
+        for name, fn in gauges.items():
+            try:
+                gauge_values[name] = fn()
+            except Exception:
+                gauge_values[name] = None
+
+        return {"counters": counters, "timers": timers, "gauges": gauge_values}
+
+
+metrics = MetricsRegistry()
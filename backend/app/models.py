@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, Enum as SQLEnum, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Integer, Boolean, Date, DateTime, ForeignKey, Enum as SQLEnum, UniqueConstraint, Index, FetchedValue
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import uuid
 import enum
@@ -18,6 +18,8 @@ class Family(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), unique=True, index=True, nullable=False)
+    # Bumped on every post insert/update/delete; invalidates cached search results
+    search_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -77,6 +79,8 @@ class Post(Base):
     likes_count = Column(Integer, default=0, nullable=False)
     dislikes_count = Column(Integer, default=0, nullable=False)
     comments_count = Column(Integer, default=0, nullable=False)
+    # Full-text search document, maintained by the posts_search_vector_update trigger
+    search_vector = deferred(Column(TSVECTOR, server_default=FetchedValue(), server_onupdate=FetchedValue()))
 
     # Relationships
     user = relationship("User", back_populates="posts")
@@ -84,6 +88,11 @@ class Post(Base):
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", order_by="Comment.created_at")
     reactions = relationship("PostReaction", back_populates="post", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('ix_posts_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_posts_content_trgm', 'content', postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}),
+    )
+
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -94,11 +103,17 @@ class Comment(Base):
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Full-text search document, maintained by the comments_search_vector_update trigger
+    search_vector = deferred(Column(TSVECTOR, server_default=FetchedValue(), server_onupdate=FetchedValue()))
 
     # Relationships
     post = relationship("Post", back_populates="comments")
     user = relationship("User", back_populates="comments")
 
+    __table_args__ = (
+        Index('ix_comments_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+
 
 class PostReaction(Base):
     __tablename__ = "post_reactions"
@@ -128,9 +143,78 @@ class Message(Base):
     content = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Full-text search document, maintained by the messages_search_vector_update trigger
+    search_vector = deferred(Column(TSVECTOR, server_default=FetchedValue(), server_onupdate=FetchedValue()))
 
     # Relationships
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
     recipient = relationship("User", foreign_keys=[recipient_id], back_populates="received_messages")
     family = relationship("Family", back_populates="messages")
 
+    __table_args__ = (
+        Index('ix_messages_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+
+
+class Summary(Base):
+    """Stored LLM summary, reused while its input fingerprint is unchanged"""
+    __tablename__ = "summaries"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(20), nullable=False)  # "family" or "user"
+    family_id = Column(UUID(as_uuid=True), ForeignKey("families.id", ondelete="CASCADE"), nullable=False)
+    # For user summaries: the summarized user and the member viewing it
+    # (their messages with each other are part of the input)
+    subject_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    viewer_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    summary_date = Column(Date, nullable=False)
+    model = Column(String(100), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_summaries_family_key', 'family_id', 'summary_date', 'model',
+              unique=True, postgresql_where=(kind == 'family')),
+        Index('ix_summaries_user_key', 'family_id', 'subject_id', 'viewer_id', 'summary_date', 'model',
+              unique=True, postgresql_where=(kind == 'user')),
+    )
+
+
+class SummaryJob(Base):
+    """Queued summary generation, claimed by workers with FOR UPDATE SKIP LOCKED"""
+    __tablename__ = "summary_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(20), nullable=False)  # "family" or "user"
+    family_id = Column(UUID(as_uuid=True), ForeignKey("families.id", ondelete="CASCADE"), nullable=False)
+    # NULL for scheduled jobs, which run with the server's GROQ_API_KEY
+    requested_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    subject_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    summary_date = Column(Date, nullable=False)
+    status = Column(String(20), default="queued", server_default="queued", nullable=False)  # queued/running/done/failed
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_summary_jobs_pending', 'created_at', postgresql_where=status.in_(['queued', 'running'])),
+        # At most one scheduled job per family and day, however many processes enqueue it
+        Index('ix_summary_jobs_scheduled', 'family_id', 'summary_date',
+              unique=True, postgresql_where=requested_by.is_(None)),
+    )
+
+
+# Prefix (typeahead) indexes: lower(col) LIKE 'q%' with text_pattern_ops works under any collation
+Index('ix_users_username_prefix', func.lower(User.username).label('username_lower'),
+      postgresql_ops={'username_lower': 'text_pattern_ops'})
+Index('ix_users_full_name_prefix', func.lower(User.full_name).label('full_name_lower'),
+      postgresql_ops={'full_name_lower': 'text_pattern_ops'})
+# Family names are unique case-insensitively; also serves family name typeahead
+Index('ix_families_name_lower', func.lower(Family.name).label('name_lower'), unique=True,
+      postgresql_ops={'name_lower': 'text_pattern_ops'})
+
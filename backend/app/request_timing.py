@@ -0,0 +1,150 @@
+# Per-request timing: wall, database, serialization and LLM time
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+PHASES = ("db", "serialize", "llm")
+
+
+class RequestTiming:
+    """
+    Time spent per phase while handling one request. Phases are summed
+    across threads, so concurrent LLM calls can add up to more than the
+    request's wall time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ms = {phase: 0.0 for phase in PHASES}
+        self.counts = {phase: 0 for phase in PHASES}
+        self.statements: List[Tuple[float, str]] = []  # (ms, SQL) up to REQUEST_SLOW_MAX_STATEMENTS
+        self.endpoint_returned: Optional[float] = None  # perf_counter() when the endpoint returned
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, ms: float, statement: Optional[str] = None):
+        with self._lock:
+            self.ms[phase] += ms
+            self.counts[phase] += 1
+            if statement is not None and len(self.statements) < settings.REQUEST_SLOW_MAX_STATEMENTS:
+                self.statements.append((ms, statement))
+
+    def wall_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing header value"""
+        with self._lock:
+            return ", ".join([
+                f"total;dur={self.wall_ms():.1f}",
+                f'db;dur={self.ms["db"]:.1f};desc="{self.counts["db"]} queries"',
+                f"serialize;dur={self.ms['serialize']:.1f}",
+                f'llm;dur={self.ms["llm"]:.1f};desc="{self.counts["llm"]} calls"',
+            ])
+
+
+# Set per request by the timing middleware; worker threads started with
+# contextvars.copy_context() share the request's RequestTiming
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def start_request_timing():
+    """Start timing the current request; returns (timing, token for reset_request_timing)"""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def reset_request_timing(token):
+    _current.reset(token)
+
+
+def add_time(phase: str, ms: float, statement: Optional[str] = None):
+    """Attribute time to a phase of the current request (no-op outside requests)"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(phase, ms, statement)
+
+
+@contextmanager
+def timed(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(phase, (time.perf_counter() - started) * 1000)
+
+
+# SQL: every engine, primary and replica
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("request_timing_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["request_timing_started"].pop()
+    add_time("db", (time.perf_counter() - started) * 1000, statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("request_timing_started"):
+        started = conn.info["request_timing_started"].pop()
+        add_time("db", (time.perf_counter() - started) * 1000, exception_context.statement)
+
+
+# Serialization: everything a route's handler does after the endpoint
+# returns, i.e. response_model validation and encoding and rendering the
+# response. Routers opt in with route_class=TimedRoute.
+def _mark_endpoint_return(call):
+    def mark():
+        timing = _current.get()
+        if timing is not None:
+            timing.endpoint_returned = time.perf_counter()
+
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def timed_call(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                mark()
+    else:
+        @functools.wraps(call)
+        def timed_call(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                mark()
+    return timed_call
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that counts the time from the endpoint's return to the finished response as serialize time"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependant.call = _mark_endpoint_return(self.dependant.call)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timing = _current.get()
+            if timing is not None and timing.endpoint_returned is not None:
+                timing.add("serialize", (time.perf_counter() - timing.endpoint_returned) * 1000)
+                timing.endpoint_returned = None
+            return response
+
+        return timed_handler
@@ -1,9 +1,12 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 from uuid import UUID
 
 
+MAX_SIGNUP_FAMILIES = 20
+
+
 # User Schemas
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
@@ -14,7 +17,9 @@ class UserBase(BaseModel):
 
 class UserCreate(UserBase):
     password: str = Field(..., min_length=6)
-    family_names: List[str] = Field(..., min_items=1, description="List of family names to join")
+    family_names: List[str] = Field(
+        ..., min_items=1, max_items=MAX_SIGNUP_FAMILIES, description="List of family names to join"
+    )
 
 
 class UserUpdate(BaseModel):
@@ -147,6 +152,15 @@ class FamilyResponse(FamilyBase):
         from_attributes = True
 
 
+class FamilyWithActivity(FamilyResponse):
+    unread_messages: int = 0
+    new_posts: int = 0
+
+
+class MeResponse(UserResponse):
+    families: Optional[List[FamilyWithActivity]] = None  # Only with ?include_families=true
+
+
 class FamilySelection(BaseModel):
     family_id: UUID
 
@@ -159,7 +173,49 @@ class LoginResponse(BaseModel):
 
 
 # Search Schemas
+class PostSearchResult(PostResponse):
+    rank: Optional[float] = None
+    snippet: Optional[str] = None  # HTML-escaped content with matches wrapped in <mark>
+
+
 class SearchResponse(BaseModel):
-    posts: List[PostResponse]
+    posts: List[PostSearchResult]
     total: int
+    total_is_lower_bound: bool = False  # More than `total` matches exist (total_mode=capped)
+    total_is_estimate: bool = False  # `total` is a planner estimate (total_mode=estimated)
+
+
+class SearchResultItem(BaseModel):
+    type: Literal["post", "comment", "message"]
+    id: UUID
+    rank: float
+    created_at: datetime
+    snippet: Optional[str] = None  # HTML-escaped content with matches wrapped in <mark>
+    post: Optional[PostResponse] = None
+    comment: Optional[CommentResponse] = None
+    message: Optional[MessageResponse] = None
+
+
+class UnifiedSearchResponse(BaseModel):
+    results: List[SearchResultItem]
+    # Cursor to pass back per type (as <type>_cursor) for the next page. "end"
+    # means the type is exhausted: passing it back skips the type, while
+    # omitting a cursor restarts that type from its first page
+    cursors: Dict[str, str]
+
+
+class TypeaheadMember(BaseModel):
+    id: UUID
+    username: str
+    full_name: Optional[str] = None
+
+
+class TypeaheadFamily(BaseModel):
+    id: UUID
+    name: str
+
+
+class TypeaheadResponse(BaseModel):
+    members: List[TypeaheadMember]
+    families: List[TypeaheadFamily]
 
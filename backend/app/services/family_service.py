@@ -0,0 +1,203 @@
+# Family lookup and roster helpers
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, and_, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.cache import LRUCache
+from app.config import settings
+from app.models import Family, User, UserFamily, Message, Post
+
+
+def find_family_by_name(db: Session, name: str) -> Optional[Family]:
+    """
+    Case-insensitive lookup served by the unique lower(name) index. Both
+    sides are lowered by Postgres, which can disagree with str.lower() on
+    non-ASCII names.
+    """
+    return db.query(Family).filter(func.lower(Family.name) == func.lower(name.strip())).first()
+
+
+def insert_family_if_absent(db: Session, name: str) -> Optional[Family]:
+    """
+    INSERT ... ON CONFLICT (lower(name)) DO NOTHING
+
+    Returns the new family, or None if a family with this name (in any
+    case) already exists or is being created concurrently.
+    """
+    stmt = (
+        pg_insert(Family)
+        .values(id=uuid.uuid4(), name=name.strip())
+        .on_conflict_do_nothing(index_elements=[func.lower(Family.name)])
+        .returning(Family)
+    )
+    return db.execute(stmt).scalar()
+
+
+def resolve_or_create_family(db: Session, name: str) -> Tuple[Family, bool]:
+    """
+    Get the family with this name (case-insensitive), creating it with the
+    exact name given if it doesn't exist. Safe against concurrent creators.
+
+    Returns (family, created).
+    """
+    family = find_family_by_name(db, name)
+    if family:
+        return family, False
+
+    family = insert_family_if_absent(db, name)
+    if family:
+        return family, True
+
+    # Lost the race: another request created it between our lookup and insert
+    return find_family_by_name(db, name), False
+
+
+def resolve_or_create_families(db: Session, names: Iterable[str]) -> List[Family]:
+    """
+    Batch form of resolve_or_create_family for signup and bulk onboarding.
+
+    Names are deduplicated case-insensitively (first spelling wins), resolved
+    with one indexed query, and the missing ones created with one multi-row
+    INSERT ... ON CONFLICT DO NOTHING. Returns families in input order.
+
+    Names are matched on Postgres' lower(name), the unique index key, as
+    returned by the queries; str.lower() disagrees with it for some
+    non-ASCII names.
+    """
+    names = [name.strip() for name in names if name.strip()]
+    if not names:
+        return []
+
+    # Each requested name with its key, and the family already using that key
+    requested = (
+        func.unnest(bindparam("names", names, type_=ARRAY(Family.name.type)))
+        .table_valued("name", with_ordinality="position")
+        .render_derived()
+    )
+    rows = db.execute(
+        select(requested.c.name, func.lower(requested.c.name), Family)
+        .outerjoin(Family, func.lower(Family.name) == func.lower(requested.c.name))
+        .order_by(requested.c.position)
+    ).all()
+    wanted = {}  # lower(name) -> first spelling
+    found = {}
+    for name, key, family in rows:
+        wanted.setdefault(key, name)
+        if family is not None:
+            found[key] = family
+
+    missing = [name for key, name in wanted.items() if key not in found]
+    if missing:
+        stmt = (
+            pg_insert(Family)
+            .values([{"id": uuid.uuid4(), "name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=[func.lower(Family.name)])
+            .returning(Family, func.lower(Family.name))
+        )
+        found.update({key: family for family, key in db.execute(stmt).all()})
+
+        # Names created concurrently by another request between lookup and insert
+        raced = [key for key in wanted if key not in found]
+        if raced:
+            found.update({key: family for family, key in db.execute(
+                select(Family, func.lower(Family.name)).filter(func.lower(Family.name).in_(raced))
+            ).all()})
+
+    return [found[key] for key in wanted if key in found]
+
+
+@dataclass(frozen=True)
+class MemberRecord:
+    id: UUID
+    username: str
+    full_name: Optional[str]
+    email: str
+
+
+# Entries are dropped on join in this worker; other workers pick up joins
+# within ROSTER_CACHE_TTL_SECONDS.
+roster_cache = LRUCache("roster.cache", settings.ROSTER_CACHE_SIZE, settings.ROSTER_CACHE_TTL_SECONDS)
+
+
+def get_family_roster(db: Session, family_id: UUID, expect_member: Optional[UUID] = None) -> Tuple[MemberRecord, ...]:
+    """
+    All members of a family, loaded with one join and cached per family.
+
+    If expect_member is given and missing from the cached roster, the roster
+    is reloaded once, so a join handled by another worker is never reported
+    as "not a member".
+    """
+    roster = roster_cache.get(family_id)
+    if roster is not None and expect_member is not None and find_member(roster, expect_member) is None:
+        roster = None
+    if roster is None:
+        rows = (
+            db.query(User.id, User.username, User.full_name, User.email)
+            .join(UserFamily, UserFamily.user_id == User.id)
+            .filter(UserFamily.family_id == family_id)
+            .order_by(User.username)
+            .all()
+        )
+        roster = tuple(MemberRecord(*row) for row in rows)
+        roster_cache.put(family_id, roster)
+    return roster
+
+
+def find_member(roster: Iterable[MemberRecord], user_id: UUID) -> Optional[MemberRecord]:
+    return next((member for member in roster if member.id == user_id), None)
+
+
+def invalidate_family_roster(*family_ids: UUID):
+    """Call after committing a membership change"""
+    for family_id in family_ids:
+        roster_cache.invalidate(family_id)
+
+
+def get_user_families(db: Session, user_id: UUID) -> List[Family]:
+    """Families a user belongs to, in join order, with one join query"""
+    return (
+        db.query(Family)
+        .join(UserFamily, UserFamily.family_id == Family.id)
+        .filter(UserFamily.user_id == user_id)
+        .order_by(UserFamily.joined_at, Family.name)
+        .all()
+    )
+
+
+def get_user_families_with_counts(db: Session, user_id: UUID, since: datetime) -> List[Tuple[Family, int, int]]:
+    """
+    Families a user belongs to with per-family activity counts, in one query.
+
+    Returns (family, unread_messages, new_posts) tuples, where new_posts
+    counts other members' posts created after `since`.
+    """
+    unread = (
+        db.query(Message.family_id, func.count().label("count"))
+        .filter(Message.recipient_id == user_id, Message.is_read == False)
+        .group_by(Message.family_id)
+        .subquery()
+    )
+    new_posts = (
+        db.query(Post.family_id, func.count().label("count"))
+        .join(UserFamily, and_(UserFamily.family_id == Post.family_id, UserFamily.user_id == user_id))
+        .filter(Post.created_at > since, Post.user_id != user_id)
+        .group_by(Post.family_id)
+        .subquery()
+    )
+    rows = (
+        db.query(Family, func.coalesce(unread.c.count, 0), func.coalesce(new_posts.c.count, 0))
+        .join(UserFamily, UserFamily.family_id == Family.id)
+        .outerjoin(unread, unread.c.family_id == Family.id)
+        .outerjoin(new_posts, new_posts.c.family_id == Family.id)
+        .filter(UserFamily.user_id == user_id)
+        .order_by(UserFamily.joined_at, Family.name)
+        .all()
+    )
+    return [(family, unread_count, new_post_count) for family, unread_count, new_post_count in rows]
+
@@ -0,0 +1,147 @@
+# Chat completion backends behind GroqLLMService: the Groq API and a local fake
+import hashlib
+import random
+import re
+import time
+from typing import Dict, Iterator, List
+
+from app.config import settings
+from app.services.llm_clients import groq_clients
+
+
+class LLMBackend:
+    """
+    Chat completion backend. complete() returns the response text; stream()
+    starts the request and returns an iterator of text deltas. Both raise
+    on failure, so the caller's breakers and fallback see errors.
+    """
+
+    name = "base"
+
+    def complete(self, model: str, messages: List[Dict], temperature: float, max_tokens: int, timeout: float) -> str:
+        raise NotImplementedError
+
+    def stream(
+        self, model: str, messages: List[Dict], temperature: float, max_tokens: int, timeout: float
+    ) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class GroqBackend(LLMBackend):
+    """The Groq API, through the shared client for the API key"""
+
+    name = "groq"
+
+    def __init__(self, api_key: str):
+        self.client = groq_clients.get(api_key)
+
+    def complete(self, model: str, messages: List[Dict], temperature: float, max_tokens: int, timeout: float) -> str:
+        response = self.client.chat.completions.create(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+        return response.choices[0].message.content
+
+    def stream(
+        self, model: str, messages: List[Dict], temperature: float, max_tokens: int, timeout: float
+    ) -> Iterator[str]:
+        # Send the request now, so connection and API errors surface here
+        # rather than on the first read
+        stream = self.client.chat.completions.create(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            timeout=timeout
+        )
+        return (
+            chunk.choices[0].delta.content
+            for chunk in stream
+            if chunk.choices and chunk.choices[0].delta.content
+        )
+
+
+_CONTENT_WORD_RE = re.compile(r"[^\W\d_]{4,}")
+_DELTA_RE = re.compile(r"\S+\s*")
+_FILLER_WORDS = ["family", "day", "shared", "together", "update", "news", "moment", "weekend"]
+_MOODS = ["cheerful", "relaxed", "busy", "thoughtful", "upbeat", "content", "energetic", "reflective"]
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Local stand-in for the API, for offline development and benchmarks.
+
+    The response is a function of the model and the prompt only: a few
+    sentences built from words in the prompt's "- " lines, in the
+    POST_SUMMARY/SENTIMENT format when the prompt asks for it. Timing
+    follows FAKE_LLM_LATENCY_MS to the first token, then
+    FAKE_LLM_TOKENS_PER_SECOND (one token per word). A response that
+    would take longer than the call's timeout raises TimeoutError once
+    the timeout has passed.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: float = None, tokens_per_second: float = None):
+        self.latency_ms = settings.FAKE_LLM_LATENCY_MS if latency_ms is None else latency_ms
+        self.tokens_per_second = settings.FAKE_LLM_TOKENS_PER_SECOND if tokens_per_second is None else tokens_per_second
+
+    def complete(self, model: str, messages: List[Dict], temperature: float, max_tokens: int, timeout: float) -> str:
+        deltas = self._deltas(model, messages, max_tokens)
+        self._sleep(self.latency_ms / 1000 + self._token_seconds(len(deltas)), timeout)
+        return "".join(deltas)
+
+    def stream(
+        self, model: str, messages: List[Dict], temperature: float, max_tokens: int, timeout: float
+    ) -> Iterator[str]:
+        deltas = self._deltas(model, messages, max_tokens)
+        self._sleep(self.latency_ms / 1000, timeout)
+        return self._emit(deltas)
+
+    def _emit(self, deltas: List[str]) -> Iterator[str]:
+        for delta in deltas:
+            time.sleep(self._token_seconds(1))
+            yield delta
+
+    def _token_seconds(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    @staticmethod
+    def _sleep(seconds: float, timeout: float):
+        if seconds > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Fake LLM response exceeded the request timeout")
+        time.sleep(seconds)
+
+    @staticmethod
+    def _deltas(model: str, messages: List[Dict], max_tokens: int) -> List[str]:
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        rng = random.Random(hashlib.sha256(f"{model}|{prompt}".encode()).digest())
+        content = " ".join(line[2:] for line in prompt.splitlines() if line.startswith("- "))
+        vocabulary = _CONTENT_WORD_RE.findall(content) or _FILLER_WORDS
+
+        def sentence() -> str:
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(8, 16))]
+            return " ".join(words).capitalize() + "."
+
+        if "POST_SUMMARY:" in prompt:
+            text = (
+                f"POST_SUMMARY: {sentence()} {sentence()}\n"
+                f"SENTIMENT: Seems {rng.choice(_MOODS)} and {rng.choice(_MOODS)}. {sentence()}"
+            )
+        else:
+            text = " ".join(sentence() for _ in range(3))
+        return _DELTA_RE.findall(text)[:max_tokens]
+
+
+def get_backend(api_key: str) -> LLMBackend:
+    """The backend selected by LLM_BACKEND"""
+    if settings.LLM_BACKEND == "groq":
+        return GroqBackend(api_key)
+    if settings.LLM_BACKEND == "fake":
+        return FakeLLMBackend()
+    raise ValueError(f"Unknown LLM_BACKEND: {settings.LLM_BACKEND}")
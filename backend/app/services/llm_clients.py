@@ -0,0 +1,57 @@
+# Shared, reusable Groq clients
+import hashlib
+
+import httpx
+from groq import DefaultHttpxClient, Groq
+
+from app.cache import LRUCache
+from app.config import settings
+
+
+class GroqClientRegistry:
+    """
+    Bounded registry of Groq clients, one per API key.
+
+    Entries are keyed by a SHA-256 of the API key, so keys never appear in
+    cache keys or metrics. They are dropped after GROQ_CLIENT_TTL_SECONDS
+    without use, or least recently used first when the registry is full.
+    Dropping an entry releases the registry's only reference to the key;
+    a request still using that client keeps it until the request finishes.
+    All clients share one httpx connection pool, so requests reuse
+    keep-alive TLS connections to the API whatever key they use.
+
+    base_url (GROQ_BASE_URL) can point at a local stand-in for the API.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = settings.GROQ_CLIENT_CACHE_SIZE,
+        ttl_seconds: float = settings.GROQ_CLIENT_TTL_SECONDS,
+        base_url: str = settings.GROQ_BASE_URL,
+        max_connections: int = settings.GROQ_HTTP_MAX_CONNECTIONS
+    ):
+        self.base_url = base_url
+        self._http_client = DefaultHttpxClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self._clients = LRUCache("llm.clients", max_clients, ttl_seconds)
+
+    def get(self, api_key: str) -> Groq:
+        # Release idle keys promptly, not only when they are looked up again
+        self._clients.purge_expired()
+        key = hashlib.sha256(api_key.encode()).hexdigest()
+        client = self._clients.get(key)
+        if client is None:
+            # No SDK retries: call_with_fallback retries on the fallback model, and
+            # SDK retries would run past the call deadline and hide errors from the breakers
+            client = Groq(api_key=api_key, base_url=self.base_url, http_client=self._http_client, max_retries=0)
+            self._clients.put(key, client)
+        return client
+
+    def close(self):
+        """Drop all clients and close the shared connection pool"""
+        self._clients.clear()
+        self._http_client.close()
+
+
+groq_clients = GroqClientRegistry()
@@ -0,0 +1,252 @@
+# Circuit breakers, hedged requests and deadlines for LLM calls
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Callable, Dict, Optional, TypeVar
+
+from app.config import settings
+from app.metrics import metrics
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class LLMUnavailableError(Exception):
+    """Every model's circuit is open, or the call deadline passed"""
+
+
+class CircuitBreaker:
+    """
+    Per-model breaker over a rolling window of recent calls.
+
+    Calls that fail or take longer than LLM_BREAKER_SLOW_CALL_SECONDS count
+    as errors. Once at least LLM_BREAKER_MIN_CALLS are in the window and
+    the error rate reaches LLM_BREAKER_ERROR_RATE the breaker opens and
+    rejects calls for LLM_BREAKER_OPEN_SECONDS, then lets a single trial
+    call through (half-open) whose outcome closes or reopens it.
+
+    Exposes llm.breaker.<model>.state (0 closed, 1 half-open, 2 open),
+    .error_rate and .p95_ms gauges and an .opened counter.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._lock = threading.Lock()
+        self._calls = deque()  # (finished_at, ok, latency_seconds)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        prefix = f"llm.breaker.{model}"
+        metrics.gauge(f"{prefix}.state", lambda: _STATE_VALUES[self.state])
+        metrics.gauge(f"{prefix}.error_rate", self.error_rate)
+        metrics.gauge(f"{prefix}.p95_ms", lambda: (self.latency_percentile(95) or 0) * 1000)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= settings.LLM_BREAKER_OPEN_SECONDS:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def available(self) -> bool:
+        """Whether allow() could admit a call now, without claiming a trial"""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and not self._trial_in_flight)
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; in half-open, admits one trial call"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, ok: bool, latency: float):
+        ok = ok and latency <= settings.LLM_BREAKER_SLOW_CALL_SECONDS
+        now = time.monotonic()
+        with self._lock:
+            self._calls.append((now, ok, latency))
+            self._trim(now)
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trial_in_flight = False
+                if ok:
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open(now)
+            elif state == CLOSED and not ok:
+                errors = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+                if (
+                    len(self._calls) >= settings.LLM_BREAKER_MIN_CALLS
+                    and errors / len(self._calls) >= settings.LLM_BREAKER_ERROR_RATE
+                ):
+                    self._open(now)
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        metrics.incr(f"llm.breaker.{self.model}.opened")
+
+    def _trim(self, now: float):
+        while self._calls and now - self._calls[0][0] > settings.LLM_BREAKER_WINDOW_SECONDS:
+            self._calls.popleft()
+
+    def error_rate(self) -> float:
+        with self._lock:
+            self._trim(time.monotonic())
+            if not self._calls:
+                return 0.0
+            return sum(1 for _, ok, _ in self._calls if not ok) / len(self._calls)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Latency (seconds) of successful calls in the window, None without enough samples"""
+        with self._lock:
+            self._trim(time.monotonic())
+            latencies = sorted(latency for _, ok, latency in self._calls if ok)
+        if len(latencies) < settings.LLM_BREAKER_MIN_CALLS:
+            return None
+        index = min(len(latencies) - 1, math.ceil(percentile / 100 * len(latencies)) - 1)
+        return latencies[max(0, index)]
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+# Hedged attempts run here; a losing attempt finishes in the background,
+# bounded by its own deadline
+_executor = ThreadPoolExecutor(max_workers=settings.LLM_CALL_THREADS, thread_name_prefix="llm-call")
+# Work that fans out LLM calls and waits on them runs here, never on
+# _executor, whose threads it would hold while waiting for its own attempts.
+# Tasks make LLM calls but never wait on other tasks, for the same reason.
+_task_executor = ThreadPoolExecutor(max_workers=settings.LLM_TASK_THREADS, thread_name_prefix="llm-task")
+
+
+def submit_llm_task(fn: Callable[..., T], *args) -> "Future[T]":
+    """
+    Run fn(*args) on the shared task pool (LLM_TASK_THREADS per worker), in
+    a copy of the caller's context so its LLM time counts towards the request
+    """
+    return _task_executor.submit(copy_context().run, fn, *args)
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker(model)
+        return _breakers[model]
+
+
+def _attempt(model: str, call: Callable[[str, float], T], deadline: float) -> T:
+    breaker = get_breaker(model)
+    started = time.monotonic()
+    try:
+        result = call(model, max(0.1, deadline - started))
+    except Exception:
+        breaker.record(False, time.monotonic() - started)
+        metrics.incr(f"llm.calls.{model}.errors")
+        raise
+    latency = time.monotonic() - started
+    breaker.record(True, latency)
+    metrics.observe(f"llm.calls.{model}.latency_ms", latency * 1000)
+    return result
+
+
+def hedge_delay(model: str) -> Optional[float]:
+    """Seconds to wait for the primary before hedging, None to never hedge"""
+    if settings.LLM_HEDGE_PERCENTILE <= 0:
+        return None
+    observed = get_breaker(model).latency_percentile(settings.LLM_HEDGE_PERCENTILE)
+    if observed is None:
+        return settings.LLM_HEDGE_DEFAULT_SECONDS
+    return max(settings.LLM_HEDGE_MIN_SECONDS, observed)
+
+
+def call_with_fallback(
+    primary: str,
+    fallback: str,
+    call: Callable[[str, float], T],
+    deadline_seconds: float = None,
+    hedge: bool = True
+) -> T:
+    """
+    Run call(model, timeout_seconds) against the primary model with a
+    fallback, within an overall deadline (LLM_CALL_DEADLINE_SECONDS).
+
+    - A model whose breaker is open is skipped.
+    - If the primary fails, the fallback starts immediately.
+    - If the primary is still running after its hedge delay (its
+      LLM_HEDGE_PERCENTILE latency), the fallback starts too and the first
+      successful result wins (unless hedge is False).
+
+    Raises LLMUnavailableError if no model is available or the deadline
+    passes, otherwise the last model error.
+    """
+    deadline = time.monotonic() + (deadline_seconds or settings.LLM_CALL_DEADLINE_SECONDS)
+    remaining = [model for model in (primary, fallback) if get_breaker(model).available()]
+    pending = {}
+
+    def start_next() -> bool:
+        while remaining:
+            model = remaining.pop(0)
+            # allow() claims the half-open trial slot, so only call it when starting
+            if get_breaker(model).allow():
+                pending[_executor.submit(_attempt, model, call, deadline)] = model
+                return True
+        return False
+
+    if not start_next():
+        metrics.incr("llm.calls.rejected")
+        raise LLMUnavailableError("All LLM models are temporarily unavailable")
+
+    hedge_at = None
+    if remaining and hedge:
+        delay = hedge_delay(next(iter(pending.values())))
+        hedge_at = time.monotonic() + delay if delay is not None else None
+
+    last_error: Optional[Exception] = None
+    while pending:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        wake_at = deadline if hedge_at is None else min(deadline, hedge_at)
+        done, _ = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            model = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if model != primary:
+                metrics.incr("llm.calls.fallback_wins")
+            return result
+
+        # Start the fallback if the primary failed, or is slow enough to hedge
+        hedge_due = hedge_at is not None and time.monotonic() >= hedge_at
+        if remaining and (not pending or hedge_due):
+            if pending:
+                metrics.incr("llm.calls.hedged")
+            start_next()
+            hedge_at = None
+
+    if pending:
+        metrics.incr("llm.calls.deadline_exceeded")
+        raise LLMUnavailableError("LLM call exceeded its deadline")
+    if last_error is None:
+        raise LLMUnavailableError("All LLM models are temporarily unavailable")
+    raise last_error
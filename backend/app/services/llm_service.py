@@ -1,23 +1,69 @@
 # LLM Service for Groq Integration
-from typing import List, Dict
-from groq import Groq
+import hashlib
+import time
+from typing import Iterator, List, Dict, Tuple
+
+from app.cache import LRUCache
+from app.config import settings
+from app.metrics import metrics
+from app.request_timing import timed
+from app.services.llm_backends import LLMBackend, get_backend
+from app.services.llm_resilience import call_with_fallback, submit_llm_task
+from app.services.prompt_builder import (
+    PromptItem, chunk_lines, dedupe, estimate_tokens, pack, token_budget, truncate_to_tokens
+)
+
+
+# Part of every stored summary's fingerprint; bump when prompts change so
+# summaries generated by the old prompts are regenerated.
+PROMPT_VERSION = "4"
+
+NO_FAMILY_POSTS = "No posts were shared by the family today."
+NO_USER_ACTIVITY = {
+    "post_summary": "No activity today.",
+    "sentiment": "No posts or messages to analyze today."
+}
+
+# Estimated tokens of the fixed prompt text around the packed content
+FAMILY_PROMPT_OVERHEAD = 200
+USER_PROMPT_OVERHEAD = 250
+
+# Map step: one chunk of posts; reduce step: consecutive partial summaries
+CHUNK_PROMPT = """Summarize these family posts in 2-3 factual sentences. Mention who shared what and the overall mood.
+
+Posts:
+{chunk}"""
+MERGE_PROMPT = """Combine these summaries of consecutive parts of a family's day into 2-3 factual sentences, in order. Keep who shared what and the overall mood.
+
+Summaries:
+{chunk}"""
+
+# Partial summaries of post chunks (and merged partials), keyed by backend, model, prompt
+# and chunk text, so a new post only re-summarizes the chunks it affects
+chunk_cache = LRUCache("llm.chunk_cache", settings.SUMMARY_CHUNK_CACHE_SIZE, settings.SUMMARY_CHUNK_CACHE_TTL_SECONDS)
 
 
 class GroqLLMService:
-    def __init__(self, api_key: str):
+    model = "llama-3.3-70b-versatile"
+    fallback_model = "llama-3.1-8b-instant"
+
+    def __init__(self, api_key: str, backend: LLMBackend = None):
         """
-        Initialize Groq client with API key
+        Use the backend selected by LLM_BACKEND (the Groq API by default)
         
         Args:
             api_key: Groq API key
+            backend: Backend to use instead of the configured one
         """
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.3-70b-versatile"
-        self.fallback_model = "llama-3.1-8b-instant"
+        self.backend = backend or get_backend(api_key)
     
     def _make_api_call(self, messages: List[Dict], temperature: float, max_tokens: int):
         """
-        Make API call with automatic fallback on any error
+        Make API call with fallback, per-model circuit breakers and a deadline
+        
+        The fallback model is tried when the primary fails, its breaker is
+        open, or it is slower than its usual latency (hedged request); see
+        llm_resilience.call_with_fallback.
         
         Args:
             messages: List of message dictionaries
@@ -25,26 +71,52 @@ class GroqLLMService:
             max_tokens: Maximum tokens
             
         Returns:
-            Response from the API
+            Response text
             
         Raises:
             Exception: If both primary and fallback models fail
         """
-        try:
-            return self.client.chat.completions.create(
-                messages=messages,
-                model=self.model,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-        except Exception:
-            # Try fallback model on any error
-            return self.client.chat.completions.create(
-                messages=messages,
-                model=self.fallback_model,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+        prompt_tokens = self._record_prompt_tokens(messages)
+        
+        def call(model: str, timeout: float) -> str:
+            metrics.observe(f"llm.prompt_tokens.{model}", prompt_tokens)
+            return self.backend.complete(model, messages, temperature, max_tokens, timeout)
+        
+        with timed("llm"):
+            return call_with_fallback(self.model, self.fallback_model, call)
+    
+    def _stream_api_call(self, messages: List[Dict], temperature: float, max_tokens: int) -> Iterator[str]:
+        """
+        Streaming _make_api_call: yields content deltas as they arrive
+        
+        Starting the stream goes through the breakers and fallback like
+        _make_api_call, without hedging; once tokens flow the stream cannot
+        switch models. The deadline bounds each read from the stream.
+        """
+        prompt_tokens = self._record_prompt_tokens(messages)
+        started = time.perf_counter()
+        
+        def call(model: str, timeout: float) -> Iterator[str]:
+            metrics.observe(f"llm.prompt_tokens.{model}", prompt_tokens)
+            return self.backend.stream(model, messages, temperature, max_tokens, timeout)
+        
+        # Request timing counts the whole stream, including time spent by the consumer
+        with timed("llm"):
+            stream = call_with_fallback(self.model, self.fallback_model, call, hedge=False)
+            
+            first = True
+            for delta in stream:
+                if not delta:
+                    continue
+                if first:
+                    metrics.observe("llm.first_token_ms", (time.perf_counter() - started) * 1000)
+                    first = False
+                yield delta
+    
+    def _record_prompt_tokens(self, messages: List[Dict]) -> int:
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        metrics.observe("llm.prompt_tokens", prompt_tokens)
+        return prompt_tokens
     
     def generate_family_summary(self, posts: List[Dict], users: List[Dict]) -> str:
         """
@@ -55,23 +127,75 @@ class GroqLLMService:
             users: List of all family members
             
         Returns:
-            Summary string
+            Summary string (an error description if the API call fails)
+        """
+        try:
+            return self.summarize_family(posts, users)
+        except Exception as e:
+            return f"Error generating summary: {str(e)}"
+    
+    def summarize_family(self, posts: List[Dict], users: List[Dict]) -> str:
+        """
+        Same as generate_family_summary, but raises if the API call fails
         """
         if not posts:
-            return "No posts were shared by the family today."
-        
-        # Format posts for LLM
-        posts_text = "\n".join([
-            f"- {post.get('user', {}).get('username', 'Unknown')}: {post.get('content', '')[:200]}"
-            for post in posts[:50]  # Limit to 50 posts for context
+            return NO_FAMILY_POSTS
+        return self._make_api_call(
+            messages=[{"role": "user", "content": self._family_prompt(posts, users)}],
+            temperature=0.7,
+            max_tokens=300
+        )
+    
+    def stream_family_summary(self, posts: List[Dict], users: List[Dict]) -> Iterator[str]:
+        """
+        Streaming summarize_family: yields the summary text as it is generated
+        """
+        if not posts:
+            yield NO_FAMILY_POSTS
+            return
+        yield from self._stream_api_call(
+            messages=[{"role": "user", "content": self._family_prompt(posts, users)}],
+            temperature=0.7,
+            max_tokens=300
+        )
+    
+    def _family_prompt(self, posts: List[Dict], users: List[Dict]) -> str:
+        """
+        Posts are deduplicated and packed in chronological order into chunks
+        of SUMMARY_CHUNK_TOKENS (or less, to fit the model's prompt budget).
+        A day that fits in one chunk goes into the prompt as is; otherwise
+        each chunk is summarized concurrently (cached by chunk content) and
+        the prompt merges the partial summaries. Partials that don't fit
+        the prompt budget are merged in chunks, level by level, until they
+        do.
+        """
+        # Format posts for LLM: near-duplicates dropped, a single post capped at one chunk
+        chunk_tokens = min(settings.SUMMARY_CHUNK_TOKENS, token_budget(self.model) - FAMILY_PROMPT_OVERHEAD)
+        items = dedupe([
+            PromptItem(
+                f"- {post.get('user', {}).get('username', 'Unknown')}: {post.get('content', '')}",
+                post.get('created_at', '')
+            )
+            for post in sorted(posts, key=lambda p: p.get('created_at', ''))
         ])
+        lines = [truncate_to_tokens(item.text, chunk_tokens) for item in items]
+        chunks = chunk_lines(lines, chunk_tokens)
+        members = ', '.join([u.get('username', '') for u in users])
         
-        prompt = f"""You are a helpful family assistant. Summarize the family's activity today in a warm, engaging way.
+        if len(chunks) == 1:
+            activity = "Today's Posts:\n" + "\n".join(chunks[0])
+        else:
+            partials = self._summarize_chunks(["\n".join(chunk) for chunk in chunks], CHUNK_PROMPT)
+            budget = token_budget(self.model) - FAMILY_PROMPT_OVERHEAD - estimate_tokens(members)
+            activity = "Summaries of today's posts, in order:\n" + "\n".join(
+                self._reduce_partials(partials, budget, chunk_tokens)
+            )
+        
+        return f"""You are a helpful family assistant. Summarize the family's activity today in a warm, engaging way.
 
-Family Members: {', '.join([u.get('username', '') for u in users])}
+Family Members: {members}
 
-Today's Posts:
-{posts_text}
+{activity}
 
 Create a brief, friendly summary (2-3 sentences) highlighting:
 1. Overall family mood and activity
@@ -79,16 +203,58 @@ Create a brief, friendly summary (2-3 sentences) highlighting:
 3. Any notable moments or updates
 
 Keep it positive and family-friendly."""
-
+    
+    def _reduce_partials(self, partials: List[str], budget: int, chunk_tokens: int) -> List[str]:
+        """
+        Reduce step: merge consecutive partial summaries in chunks of
+        chunk_tokens until their lines fit budget. If a level can't merge
+        anything, the lines are packed into the budget instead.
+        """
+        lines = [f"- {partial}" for partial in partials]
+        while sum(estimate_tokens(line) for line in lines) > budget:
+            groups = chunk_lines(lines, chunk_tokens)
+            if len(groups) == len(lines):
+                break
+            metrics.incr("llm.chunks.reduce_levels")
+            merged = self._summarize_chunks(["\n".join(group) for group in groups], MERGE_PROMPT)
+            lines = [f"- {partial}" for partial in merged]
+        # Zero-padded position as created_at keeps pack's output in order
+        items = pack([PromptItem(line, f"{i:06d}") for i, line in enumerate(lines)], budget)
+        return [item.text for item in items]
+    
+    def _summarize_chunks(self, chunks: List[str], prompt: str) -> List[str]:
+        """
+        Summarize chunks with prompt concurrently, reusing cached summaries.
+        Every uncached chunk is submitted at once to the shared LLM task pool
+        (LLM_TASK_THREADS), which bounds concurrency per worker across all
+        requests.
+        """
+        keys = [
+            hashlib.sha256(f"{self.backend.name}|{self.model}|{PROMPT_VERSION}|{prompt}|{chunk}".encode()).hexdigest()
+            for chunk in chunks
+        ]
+        partials = [chunk_cache.get(key) for key in keys]
+        missing = [i for i, partial in enumerate(partials) if partial is None]
+        metrics.incr("llm.chunks.cached", len(chunks) - len(missing))
+        metrics.incr("llm.chunks.summarized", len(missing))
+        
+        futures = [submit_llm_task(self._summarize_chunk, prompt.format(chunk=chunks[i])) for i in missing]
         try:
-            response = self._make_api_call(
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=300
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error generating summary: {str(e)}"
+            for i, future in zip(missing, futures):
+                partials[i] = future.result()
+                chunk_cache.put(keys[i], partials[i])
+        finally:
+            # A failed chunk fails the summary; don't leave the rest queued
+            for future in futures:
+                future.cancel()
+        return partials
+    
+    def _summarize_chunk(self, prompt: str) -> str:
+        return self._make_api_call(
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=200
+        ).strip()
     
     def generate_user_summary(self, user_posts: List[Dict], messages: List[Dict] = None) -> Dict:
         """
@@ -101,29 +267,75 @@ Keep it positive and family-friendly."""
         Returns:
             Dictionary with summary and sentiment (as free text)
         """
-        if not user_posts and not messages:
+        try:
+            return self.summarize_user(user_posts, messages)
+        except Exception as e:
             return {
-                "post_summary": "No activity today.",
-                "sentiment": "No posts or messages to analyze today."
+                "post_summary": f"Error analyzing: {str(e)}",
+                "sentiment": "Unable to analyze sentiment at this time."
             }
+    
+    def summarize_user(self, user_posts: List[Dict], messages: List[Dict] = None) -> Dict:
+        """
+        Same as generate_user_summary, but raises if the API call fails
+        """
+        if not user_posts and not messages:
+            return dict(NO_USER_ACTIVITY)
+        
+        content = self._make_api_call(
+            messages=[{"role": "user", "content": self._user_prompt(user_posts, messages)}],
+            temperature=0.5,
+            max_tokens=400
+        )
+        
+        # Parse response
+        return self._parse_user_response(content, user_posts)
+    
+    def stream_user_summary(self, user_posts: List[Dict], messages: List[Dict] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Streaming summarize_user. Yields ("post_summary", text) and
+        ("sentiment", text) deltas as the sections arrive, then ("done", dict)
+        with the same result summarize_user would return.
+        """
+        if not user_posts and not messages:
+            yield "done", dict(NO_USER_ACTIVITY)
+            return
+        
+        parser = SectionStreamParser()
+        content = ""
+        for delta in self._stream_api_call(
+            messages=[{"role": "user", "content": self._user_prompt(user_posts, messages)}],
+            temperature=0.5,
+            max_tokens=400
+        ):
+            content += delta
+            yield from parser.feed(delta)
+        yield from parser.close()
+        yield "done", self._parse_user_response(content, user_posts)
+    
+    def _user_prompt(self, user_posts: List[Dict], messages: List[Dict] = None) -> str:
+        # Pack posts, then messages, into the model's prompt budget by priority
+        budget = token_budget(self.model) - USER_PROMPT_OVERHEAD
+        post_items = pack(
+            dedupe([
+                PromptItem(f"- {post.get('content', '')}", post.get('created_at', ''), post.get('reactions', 0))
+                for post in user_posts or []
+            ]),
+            int(budget * 0.6),
+            max_item_tokens=budget // 4
+        )
+        message_items = pack(
+            dedupe([
+                PromptItem(f"- {msg.get('content', '')}", msg.get('created_at', ''))
+                for msg in messages or []
+            ]),
+            budget - sum(estimate_tokens(item.text) for item in post_items),
+            max_item_tokens=budget // 8
+        )
+        posts_text = "\n".join(item.text for item in post_items)
+        messages_text = "\n".join(item.text for item in message_items)
         
-        # Format posts
-        posts_text = ""
-        if user_posts:
-            posts_text = "\n".join([
-                f"- {post.get('content', '')[:200]}"
-                for post in user_posts
-            ])
-        
-        # Format messages
-        messages_text = ""
-        if messages:
-            messages_text = "\n".join([
-                f"- {msg.get('content', '')[:150]}"
-                for msg in messages[:20]  # Limit messages
-            ])
-        
-        prompt = f"""Analyze this person's activity today and provide:
+        return f"""Analyze this person's activity today and provide:
 1. A brief summary of their posts (2-3 sentences)
 2. Their overall sentiment/mood for the day as free-flowing descriptive text (not a score, but a natural description of how they seem to be feeling)
 
@@ -138,24 +350,6 @@ POST_SUMMARY: [summary text here]
 SENTIMENT: [free-flowing description of their mood and emotional state today - be descriptive and natural, like "seems happy and energetic" or "appears thoughtful and reflective"]
 
 Keep the sentiment description warm, empathetic, and family-friendly."""
-
-        try:
-            response = self._make_api_call(
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.5,
-                max_tokens=400
-            )
-            
-            content = response.choices[0].message.content
-            
-            # Parse response
-            return self._parse_user_response(content, user_posts)
-            
-        except Exception as e:
-            return {
-                "post_summary": f"Error analyzing: {str(e)}",
-                "sentiment": "Unable to analyze sentiment at this time."
-            }
     
     def _parse_user_response(self, content: str, posts: List[Dict]) -> Dict:
         """
@@ -206,3 +400,56 @@ Keep the sentiment description warm, empathetic, and family-friendly."""
             "sentiment": sentiment
         }
 
+
+class SectionStreamParser:
+    """
+    Incremental splitter for streamed "POST_SUMMARY: ... SENTIMENT: ..."
+    responses. feed() returns (section, text) deltas; text before any
+    marker counts as post_summary. Output that could be the start of a
+    marker split across deltas is held back until it is decided.
+    """
+
+    MARKERS = {"POST_SUMMARY:": "post_summary", "SENTIMENT:": "sentiment"}
+
+    def __init__(self):
+        self.section = "post_summary"
+        self._pending = ""
+        self._at_section_start = True
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        self._pending += delta
+        events = []
+        while True:
+            hits = [(self._pending.find(m), m) for m in self.MARKERS if m in self._pending]
+            if not hits:
+                break
+            index, marker = min(hits)
+            self._emit(events, self._pending[:index])
+            self.section = self.MARKERS[marker]
+            self._at_section_start = True
+            self._pending = self._pending[index + len(marker):]
+
+        # Keep back a tail that might be the beginning of a marker
+        hold = 0
+        for marker in self.MARKERS:
+            for size in range(min(len(marker) - 1, len(self._pending)), 0, -1):
+                if self._pending.endswith(marker[:size]):
+                    hold = max(hold, size)
+                    break
+        self._emit(events, self._pending[:len(self._pending) - hold])
+        self._pending = self._pending[len(self._pending) - hold:]
+        return events
+
+    def close(self) -> List[Tuple[str, str]]:
+        events = []
+        self._emit(events, self._pending)
+        self._pending = ""
+        return events
+
+    def _emit(self, events: List[Tuple[str, str]], text: str):
+        if self._at_section_start:
+            text = text.lstrip()
+        if text:
+            self._at_section_start = False
+            events.append((self.section, text))
+
@@ -0,0 +1,178 @@
+# Token-budgeted prompt building for LLM summaries
+import math
+import random
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List
+
+from app.config import settings
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+
+# Weight of log(1 + reactions) relative to recency (newest = 1, oldest = 0)
+REACTION_WEIGHT = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate. BPE tokenizers average ~4 characters per token on
+    English prose but split punctuation, numbers and emoji finer, so take
+    the larger of a character-based and a word-based estimate.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, math.ceil(len(_TOKEN_RE.findall(text)) * 1.3)) + 1
+
+
+def token_budget(model: str) -> int:
+    """Prompt token budget for a model (LLM_PROMPT_TOKEN_BUDGETS, else the default)"""
+    return settings.LLM_PROMPT_TOKEN_BUDGETS.get(model, settings.LLM_PROMPT_TOKEN_BUDGET)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, at a word boundary where possible"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(0, max_tokens - 1) * 4]
+    while cut and estimate_tokens(cut + "…") > max_tokens:
+        cut = cut[:int(len(cut) * 0.9)]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + "…"
+
+
+@dataclass
+class PromptItem:
+    """One post or message line; created_at is an ISO timestamp"""
+    text: str
+    created_at: str = ""
+    reactions: int = 0
+
+
+def _near_identical(a: frozenset, b: frozenset, threshold: float) -> bool:
+    if a == b:
+        return True
+    # Jaccard is at most min/max size, so very different sizes can't match
+    if min(len(a), len(b)) < threshold * max(len(a), len(b)):
+        return False
+    return len(a & b) >= threshold * len(a | b)
+
+
+# MinHash LSH for dedupe: MINHASH_BANDS bands of MINHASH_ROWS values. Items
+# with Jaccard s share a band with probability 1 - (1 - s**ROWS)**BANDS:
+# ~0.9999 at s = 0.9, ~1% for unrelated posts (s = 0.3)
+MINHASH_ROWS = 6
+MINHASH_BANDS = 12
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)  # Fixed, so every worker dedupes (and prompts) the same way
+_MINHASH_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(_MERSENNE_PRIME))
+    for _ in range(MINHASH_ROWS * MINHASH_BANDS)
+]
+del _rng
+
+
+@lru_cache(maxsize=65536)
+def _word_minhashes(word: str) -> tuple:
+    x = zlib.crc32(word.encode())
+    return tuple((a * x + b) % _MERSENNE_PRIME for a, b in _MINHASH_PERMUTATIONS)
+
+
+def _lsh_bands(words: frozenset) -> List[tuple]:
+    signature = list(map(min, zip(*(_word_minhashes(word) for word in words))))
+    return [
+        (band, tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def dedupe(items: List[PromptItem], threshold: float = 0.9) -> List[PromptItem]:
+    """
+    Drop items whose words are near-identical (Jaccard similarity of word
+    sets >= threshold) to an earlier item; the earlier item keeps the
+    reactions of its duplicates.
+
+    Exact duplicates are found by hashing the word set. For near-duplicates
+    only kept items sharing a MinHash LSH band are compared, instead of
+    every pair; the bands are tuned for the default threshold.
+    """
+    kept = []
+    kept_words = []
+    exact = {}  # word set -> index in kept
+    by_band = defaultdict(list)  # LSH band -> indexes in kept
+    for item in items:
+        words = frozenset(w.lower() for w in _WORD_RE.findall(item.text))
+        duplicate_of = exact.get(words)
+        bands = []
+        if duplicate_of is None and words:
+            bands = _lsh_bands(words)
+            candidates = sorted({i for band in bands for i in by_band.get(band, ())})
+            duplicate_of = next(
+                (i for i in candidates if _near_identical(words, kept_words[i], threshold)), None
+            )
+        if duplicate_of is None:
+            exact[words] = len(kept)
+            for band in bands:
+                by_band[band].append(len(kept))
+            kept.append(PromptItem(item.text, item.created_at, item.reactions))
+            kept_words.append(words)
+        else:
+            kept[duplicate_of].reactions += item.reactions
+    return kept
+
+
+def pack(items: List[PromptItem], budget: int, max_item_tokens: int = None) -> List[PromptItem]:
+    """
+    Choose items by priority until the token budget is spent and return them
+    in chronological order. Priority is recency (newest first) plus a boost
+    for reactions; items longer than max_item_tokens are truncated first so
+    one long post cannot use up the whole budget.
+    """
+    if not items or budget <= 0:
+        return []
+    max_item_tokens = max_item_tokens or budget
+
+    by_age = sorted(items, key=lambda item: item.created_at)
+    span = max(1, len(by_age) - 1)
+    scored = [
+        (i / span + REACTION_WEIGHT * math.log1p(max(0, item.reactions)), item)
+        for i, item in enumerate(by_age)
+    ]
+    scored.sort(key=lambda entry: entry[0], reverse=True)
+
+    chosen = []
+    used = 0
+    for _, item in scored:
+        text = truncate_to_tokens(item.text, max_item_tokens)
+        tokens = estimate_tokens(text)
+        if used + tokens > budget:
+            continue
+        chosen.append(PromptItem(text, item.created_at, item.reactions))
+        used += tokens
+    chosen.sort(key=lambda item: item.created_at)
+    return chosen
+
+
+def chunk_lines(lines: List[str], max_tokens: int) -> List[List[str]]:
+    """
+    Greedily pack lines, in order, into chunks of at most max_tokens.
+    Appending lines only ever changes the last chunk.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for line in lines:
+        line_tokens = estimate_tokens(line)
+        if current and current_tokens + line_tokens > max_tokens:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append(current)
+    return chunks
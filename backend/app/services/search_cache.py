@@ -0,0 +1,68 @@
+# Search result cache and hydration helpers
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, joinedload
+
+from app.cache import LRUCache
+from app.config import settings
+from app.models import Family, Post
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    post_id: UUID
+    rank: Optional[float] = None
+    snippet: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class CachedSearch:
+    hits: Tuple[SearchHit, ...]
+    total: int
+    total_is_lower_bound: bool = False
+    total_is_estimate: bool = False
+
+
+# Keys include the family's search_version, so a post write makes every
+# cached result for that family unreachable; stale entries then age out
+# through LRU eviction or the TTL.
+search_cache = LRUCache("search.cache", settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL_SECONDS)
+
+
+def normalize_query(q: str, mode: str) -> str:
+    """Cache key form of a query; substring matching is whitespace-sensitive"""
+    if mode == "substring":
+        return q.lower()
+    return _WHITESPACE_RE.sub(" ", q).strip().lower()
+
+
+def get_search_version(db: Session, family_id: UUID) -> int:
+    return db.query(Family.search_version).filter(Family.id == family_id).scalar() or 0
+
+
+def bump_search_version(db: Session, family_id: UUID):
+    """
+    Invalidate cached searches for a family; call inside the post write's
+    transaction. updated_at is carried over explicitly, or its onupdate
+    would mark the family itself as edited on every post or comment write.
+    """
+    db.execute(
+        update(Family)
+        .where(Family.id == family_id)
+        .values(search_version=Family.search_version + 1, updated_at=Family.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def hydrate_posts(db: Session, post_ids: List[UUID]) -> Dict[UUID, Post]:
+    """Load posts (with authors) for a list of ids in one query"""
+    if not post_ids:
+        return {}
+    posts = db.query(Post).options(joinedload(Post.user)).filter(Post.id.in_(post_ids)).all()
+    return {post.id: post for post in posts}
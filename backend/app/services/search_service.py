@@ -0,0 +1,183 @@
+# Search helpers for PostgreSQL full-text and trigram search
+import base64
+import html
+import json
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+# Must match the configuration used by the posts_search_vector_update trigger
+SEARCH_CONFIG = "english"
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=10, MaxFragments=2"
+
+_TOKEN_RE = re.compile(r'(-?)"([^"]*)"?|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_tsquery(q: str) -> Optional[str]:
+    """
+    Translate a user search string into to_tsquery() syntax
+
+    Supported syntax:
+        word        must contain word (stemmed)
+        "two words" phrase, words adjacent and in order
+        word*       prefix match
+        -word       must not contain word (also -"a phrase")
+        a OR b      either term
+
+    Returns None if the query contains no searchable words.
+    """
+    terms: List[str] = []
+    operators: List[str] = []
+    pending_or = False
+
+    for match in _TOKEN_RE.finditer(q):
+        negated, phrase, token = match.group(1), match.group(2), match.group(3)
+        prefix = False
+
+        if token is not None:
+            if token.upper() == "OR":
+                pending_or = bool(terms)
+                continue
+            negated = token.startswith("-")
+            prefix = token.endswith("*")
+            words = _WORD_RE.findall(token)
+        else:
+            words = _WORD_RE.findall(phrase)
+
+        if not words:
+            continue
+
+        words = [w.lower() for w in words]
+        if prefix:
+            words[-1] = f"{words[-1]}:*"
+        term = " <-> ".join(words)
+        if len(words) > 1:
+            term = f"({term})"
+        if negated:
+            term = f"!{term}"
+
+        if terms:
+            operators.append(" | " if pending_or else " & ")
+        terms.append(term)
+        pending_or = False
+
+    if not terms:
+        return None
+
+    query = terms[0]
+    for operator, term in zip(operators, terms[1:]):
+        query += operator + term
+    return query
+
+
+def tsquery(query: str):
+    """SQL expression for a query string produced by build_tsquery()"""
+    return func.to_tsquery(SEARCH_CONFIG, query)
+
+
+def html_escaped(column):
+    """Escape HTML in a text column so highlighted snippets are safe to render"""
+    return func.replace(func.replace(func.replace(column, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+
+
+def headline(column, ts_query):
+    """Highlighted snippet of column for ts_query, with matches wrapped in <mark>"""
+    return func.ts_headline(SEARCH_CONFIG, html_escaped(column), ts_query, HEADLINE_OPTIONS)
+
+
+def _escape_like(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_pattern(q: str) -> str:
+    """'%q%' substring pattern with LIKE wildcards in q escaped (escape char is backslash)"""
+    return f"%{_escape_like(q)}%"
+
+
+def prefix_pattern(q: str) -> str:
+    """Lowercased 'q%' prefix pattern, matched against lower(column) text_pattern_ops indexes"""
+    return f"{_escape_like(q.lower())}%"
+
+
+def substring_snippet(content: str, q: str, context_chars: int = 60) -> Optional[str]:
+    """HTML-escaped window around the first case-insensitive occurrence of q, marked with <mark>"""
+    # Match on the original string: lower() can change length ('İ'), shifting offsets
+    match = re.search(re.escape(q), content, re.IGNORECASE)
+    if match is None:
+        return None
+    position, match_end = match.span()
+    start = max(position - context_chars, 0)
+    end = min(match_end + context_chars, len(content))
+    return "".join([
+        "…" if start > 0 else "",
+        html.escape(content[start:position]),
+        "<mark>", html.escape(content[position:match_end]), "</mark>",
+        html.escape(content[match_end:end]),
+        "…" if end < len(content) else "",
+    ])
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper for a select statement"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def count_total(db, id_query, total_mode: str, cap: int) -> Tuple[int, bool, bool]:
+    """
+    Count rows matched by id_query
+
+    total_mode:
+        exact:     full count(*)
+        capped:    count at most cap + 1 rows; beyond cap the total is a lower bound
+        estimated: planner row estimate from EXPLAIN, no rows are scanned
+
+    Returns (total, total_is_lower_bound, total_is_estimate).
+    """
+    if total_mode == "estimated":
+        plan = db.execute(Explain(id_query.statement)).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"]), False, True
+
+    if total_mode == "capped":
+        bounded = id_query.limit(cap + 1).subquery()
+        total = db.query(func.count()).select_from(bounded).scalar()
+        if total > cap:
+            return cap, True, False
+        return total, False, False
+
+    return id_query.count(), False, False
+
+
+# Cursor of a type with no further results; search_all skips such types
+EXHAUSTED_CURSOR = "end"
+
+
+def encode_cursor(rank: float, created_at: datetime, row_id: UUID) -> str:
+    """Opaque keyset cursor for a (rank, created_at, id) position"""
+    payload = json.dumps([rank, created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, datetime, UUID]:
+    """Inverse of encode_cursor(); raises ValueError on malformed input"""
+    try:
+        rank, created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), datetime.fromisoformat(created_at), UUID(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
@@ -0,0 +1,184 @@
+# Data loaders for LLM summary inputs: slim rows and SQL-side aggregates
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Text, and_, case, cast, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.models import Message, Post, User
+
+
+def day_bounds(target_date: date) -> Tuple[datetime, datetime]:
+    return datetime.combine(target_date, datetime.min.time()), datetime.combine(target_date, datetime.max.time())
+
+
+def _version_digest(id_column, version_column):
+    """
+    md5 over a group's (id, version timestamp) pairs in id order, '' for an
+    empty group, so a summary's inputs are fingerprinted without fetching
+    the rows.
+    """
+    pair = func.concat(cast(id_column, Text), "@", cast(func.extract("epoch", version_column), Text))
+    return func.coalesce(func.md5(func.string_agg(pair, aggregate_order_by(literal_column("';'"), id_column))), "")
+
+
+@dataclass(frozen=True)
+class FamilyDayStats:
+    total_posts: int
+    users_active: int
+    digest: str
+
+
+def load_family_day_stats(db: Session, family_id: UUID, target_date: date) -> FamilyDayStats:
+    """Post count, distinct posters and post version digest for a family's day, in one query"""
+    start_datetime, end_datetime = day_bounds(target_date)
+    total_posts, users_active, digest = db.query(
+        func.count(Post.id),
+        func.count(func.distinct(Post.user_id)),
+        _version_digest(Post.id, Post.updated_at)
+    ).filter(
+        Post.family_id == family_id,
+        Post.created_at >= start_datetime,
+        Post.created_at <= end_datetime
+    ).one()
+    return FamilyDayStats(total_posts, users_active, digest)
+
+
+def load_family_day_posts(db: Session, family_id: UUID, target_date: date) -> List[Tuple[str, str, datetime]]:
+    """(content, username, created_at) of a family's posts for the day, newest first"""
+    start_datetime, end_datetime = day_bounds(target_date)
+    return db.query(Post.content, User.username, Post.created_at).join(
+        User, User.id == Post.user_id
+    ).filter(
+        Post.family_id == family_id,
+        Post.created_at >= start_datetime,
+        Post.created_at <= end_datetime
+    ).order_by(Post.created_at.desc()).all()
+
+
+@dataclass(frozen=True)
+class MemberDayStats:
+    posts: int = 0
+    post_digest: str = ""
+    messages: int = 0  # Exchanged with the viewer
+    message_digest: str = ""
+
+
+def _message_filter(family_id: UUID, viewer_id: UUID, target_date: date, member_ids: Optional[Iterable[UUID]]):
+    """The day's messages between the viewer and the given members (any member if None)"""
+    start_datetime, end_datetime = day_bounds(target_date)
+    if member_ids is None:
+        pair_filter = or_(Message.sender_id == viewer_id, Message.recipient_id == viewer_id)
+    else:
+        member_ids = list(member_ids)
+        pair_filter = or_(
+            and_(Message.sender_id == viewer_id, Message.recipient_id.in_(member_ids)),
+            and_(Message.recipient_id == viewer_id, Message.sender_id.in_(member_ids))
+        )
+    return and_(
+        Message.family_id == family_id,
+        Message.created_at >= start_datetime,
+        Message.created_at <= end_datetime,
+        pair_filter
+    )
+
+
+def _other_party(viewer_id: UUID):
+    return case((Message.sender_id == viewer_id, Message.recipient_id), else_=Message.sender_id)
+
+
+def load_member_day_stats(
+    db: Session,
+    family_id: UUID,
+    viewer_id: UUID,
+    target_date: date,
+    member_ids: Optional[Iterable[UUID]] = None
+) -> Dict[UUID, MemberDayStats]:
+    """
+    Per member: post count and digest, and count and digest of messages
+    exchanged with viewer_id (messages are never edited, so created_at
+    versions them). One grouped query for the given members, or every
+    member with activity if member_ids is None; members without activity
+    are absent (use MemberDayStats()).
+    """
+    member_ids = list(member_ids) if member_ids is not None else None
+    start_datetime, end_datetime = day_bounds(target_date)
+
+    posts = db.query(
+        Post.user_id.label("member_id"),
+        literal_column("'post'").label("source"),
+        func.count(Post.id).label("count"),
+        _version_digest(Post.id, Post.updated_at).label("digest")
+    ).filter(
+        Post.family_id == family_id,
+        Post.created_at >= start_datetime,
+        Post.created_at <= end_datetime
+    )
+    if member_ids is not None:
+        posts = posts.filter(Post.user_id.in_(member_ids))
+    posts = posts.group_by(Post.user_id)
+
+    # Group on the subquery's column: the other-party CASE carries a bound parameter
+    exchanged = db.query(
+        _other_party(viewer_id).label("member_id"),
+        Message.id.label("id"),
+        Message.created_at.label("version")
+    ).filter(_message_filter(family_id, viewer_id, target_date, member_ids)).subquery()
+    messages = db.query(
+        exchanged.c.member_id,
+        literal_column("'message'").label("source"),
+        func.count(exchanged.c.id).label("count"),
+        _version_digest(exchanged.c.id, exchanged.c.version).label("digest")
+    ).group_by(exchanged.c.member_id)
+
+    counts = defaultdict(dict)
+    for member_id, source, count, digest in posts.union_all(messages).all():
+        counts[member_id][source] = (count, digest)
+
+    stats = {}
+    for member_id, sources in counts.items():
+        post_count, post_digest = sources.get("post", (0, ""))
+        message_count, message_digest = sources.get("message", (0, ""))
+        stats[member_id] = MemberDayStats(post_count, post_digest, message_count, message_digest)
+    return stats
+
+
+def load_member_day_items(
+    db: Session,
+    family_id: UUID,
+    viewer_id: UUID,
+    target_date: date,
+    member_ids: Iterable[UUID]
+) -> Tuple[Dict[UUID, List[Tuple[str, datetime, int]]], Dict[UUID, List[Tuple[str, datetime]]]]:
+    """
+    The given members' posts for the day as (content, created_at, reactions)
+    and their messages with viewer_id as (content, created_at), newest first,
+    keyed by member.
+    """
+    member_ids = list(member_ids)
+    start_datetime, end_datetime = day_bounds(target_date)
+
+    posts = defaultdict(list)
+    for member_id, content, created_at, reactions in db.query(
+        Post.user_id, Post.content, Post.created_at, Post.likes_count + Post.comments_count
+    ).filter(
+        Post.family_id == family_id,
+        Post.user_id.in_(member_ids),
+        Post.created_at >= start_datetime,
+        Post.created_at <= end_datetime
+    ).order_by(Post.created_at.desc()):
+        posts[member_id].append((content, created_at, reactions))
+
+    messages = defaultdict(list)
+    for member_id, content, created_at in db.query(
+        _other_party(viewer_id), Message.content, Message.created_at
+    ).filter(
+        _message_filter(family_id, viewer_id, target_date, member_ids)
+    ).order_by(Message.created_at.desc()):
+        messages[member_id].append((content, created_at))
+
+    return posts, messages
@@ -0,0 +1,263 @@
+# Background summary jobs: Postgres-backed queue, worker pool and nightly scheduler
+import logging
+import threading
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, or_, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import metrics
+from app.models import Post, SummaryJob
+from app.services.family_service import find_member, get_family_roster
+from app.services.summary_inputs import day_bounds
+from app.services.summary_service import build_family_summary, build_user_summary
+
+logger = logging.getLogger(__name__)
+
+# Users' API keys for jobs submitted to this process. They live only in
+# memory, so a job requested by a user can only run in the process that
+# accepted it; scheduled jobs (requested_by NULL) run anywhere with
+# GROQ_API_KEY set.
+_job_keys: Dict[UUID, str] = {}
+_job_keys_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def submit_job(
+    db: Session,
+    kind: str,
+    family_id: UUID,
+    requested_by: UUID,
+    api_key: str,
+    summary_date: date,
+    subject_id: Optional[UUID] = None
+) -> SummaryJob:
+    """Queue a summary job for the worker pool and commit"""
+    job = SummaryJob(
+        kind=kind,
+        family_id=family_id,
+        requested_by=requested_by,
+        subject_id=subject_id,
+        summary_date=summary_date
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    with _job_keys_lock:
+        _job_keys[job.id] = api_key
+    metrics.incr("summary.jobs.submitted")
+    _wakeup.set()
+    return job
+
+
+def claim_next_job(db: Session) -> Optional[SummaryJob]:
+    """
+    Claim the oldest runnable job with FOR UPDATE SKIP LOCKED, so any number
+    of workers and processes can poll the table without double-running jobs.
+    Running jobs older than SUMMARY_JOB_STALE_SECONDS (crashed worker) are
+    claimed again.
+    """
+    with _job_keys_lock:
+        local_ids = list(_job_keys)
+    runnable = []
+    if local_ids:
+        runnable.append(SummaryJob.id.in_(local_ids))
+    if settings.GROQ_API_KEY:
+        runnable.append(SummaryJob.requested_by.is_(None))
+    if not runnable:
+        return None
+
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.SUMMARY_JOB_STALE_SECONDS)
+    job = (
+        db.query(SummaryJob)
+        .filter(
+            or_(*runnable),
+            or_(
+                SummaryJob.status == "queued",
+                and_(SummaryJob.status == "running", SummaryJob.started_at < stale_before)
+            )
+        )
+        .order_by(SummaryJob.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = "running"
+    job.started_at = func.now()
+    job.attempts = job.attempts + 1
+    db.commit()
+    return job
+
+
+def run_job(db: Session, job: SummaryJob):
+    """Execute a claimed job and record its result or error"""
+    with _job_keys_lock:
+        api_key = _job_keys.get(job.id)
+    if job.requested_by is None:
+        api_key = settings.GROQ_API_KEY
+
+    try:
+        if job.kind == "family":
+            result = build_family_summary(db, job.family_id, job.summary_date, api_key, raise_errors=True)
+        else:
+            roster = get_family_roster(db, job.family_id, expect_member=job.subject_id)
+            subject = find_member(roster, job.subject_id)
+            if subject is None:
+                raise ValueError("User is not a member of this family")
+            result = build_user_summary(
+                db, job.family_id, job.requested_by, subject, job.summary_date, api_key, raise_errors=True
+            )
+            result["user_id"] = str(result["user_id"])
+        job.status = "done"
+        job.result = result
+        metrics.incr("summary.jobs.done")
+    except Exception as e:
+        db.rollback()
+        logger.warning("Summary job %s failed: %s", job.id, e)
+        job.status = "failed"
+        job.error = str(e)
+        metrics.incr("summary.jobs.failed")
+    job.finished_at = func.now()
+    db.commit()
+
+    with _job_keys_lock:
+        _job_keys.pop(job.id, None)
+
+
+def fail_orphaned_jobs(db: Session) -> int:
+    """
+    Fail user jobs that stayed queued past SUMMARY_JOB_STALE_SECONDS without
+    their API key in this process (e.g. the accepting process restarted).
+    """
+    with _job_keys_lock:
+        local_ids = list(_job_keys)
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.SUMMARY_JOB_STALE_SECONDS)
+    query = db.query(SummaryJob).filter(
+        SummaryJob.status == "queued",
+        SummaryJob.requested_by.isnot(None),
+        SummaryJob.created_at < stale_before
+    )
+    if local_ids:
+        query = query.filter(SummaryJob.id.notin_(local_ids))
+    count = query.update(
+        {
+            SummaryJob.status: "failed",
+            SummaryJob.error: "Job expired before it could run; please resubmit",
+            SummaryJob.finished_at: func.now()
+        },
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+
+def enqueue_daily_family_summaries(db: Session, summary_date: date) -> int:
+    """
+    Queue a scheduled family summary for every family with posts on
+    summary_date. Idempotent across processes via ix_summary_jobs_scheduled.
+    """
+    start_datetime, end_datetime = day_bounds(summary_date)
+    family_ids = [
+        family_id for (family_id,) in
+        db.query(Post.family_id)
+        .filter(Post.created_at >= start_datetime, Post.created_at <= end_datetime)
+        .distinct()
+        .all()
+    ]
+    if not family_ids:
+        return 0
+
+    stmt = (
+        pg_insert(SummaryJob)
+        .values([
+            {"id": uuid.uuid4(), "kind": "family", "family_id": family_id, "summary_date": summary_date}
+            for family_id in family_ids
+        ])
+        .on_conflict_do_nothing(index_elements=["family_id", "summary_date"], index_where=text("requested_by IS NULL"))
+    )
+    count = db.execute(stmt).rowcount
+    db.commit()
+    if count:
+        _wakeup.set()
+    return count
+
+
+class SummaryWorkerPool:
+    """
+    Worker threads that claim and run summary jobs, plus a scheduler thread
+    that queues yesterday's family summaries after SUMMARY_PRECOMPUTE_HOUR
+    (server local time) and expires orphaned jobs.
+    """
+
+    def __init__(self, workers: int = settings.SUMMARY_WORKERS, poll_interval: float = 5.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+        self._last_precompute: Optional[date] = None
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"summary-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.workers:
+            thread = threading.Thread(target=self._schedule, name="summary-scheduler", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self):
+        while not self._stop.is_set():
+            job = None
+            db = SessionLocal()
+            try:
+                job = claim_next_job(db)
+                if job is not None:
+                    run_job(db, job)
+            except Exception:
+                logger.exception("Summary worker error")
+            finally:
+                db.close()
+            if job is None:
+                _wakeup.wait(self.poll_interval)
+                _wakeup.clear()
+
+    def _schedule(self):
+        while not self._stop.wait(60):
+            db = SessionLocal()
+            try:
+                fail_orphaned_jobs(db)
+                now = datetime.now()
+                if (
+                    settings.GROQ_API_KEY
+                    and settings.SUMMARY_PRECOMPUTE_HOUR >= 0
+                    and now.hour >= settings.SUMMARY_PRECOMPUTE_HOUR
+                    and self._last_precompute != now.date()
+                ):
+                    queued = enqueue_daily_family_summaries(db, now.date() - timedelta(days=1))
+                    self._last_precompute = now.date()
+                    logger.info("Queued %d nightly family summaries", queued)
+            except Exception:
+                logger.exception("Summary scheduler error")
+            finally:
+                db.close()
+
+
+worker_pool = SummaryWorkerPool()
@@ -0,0 +1,329 @@
+# Persistent store for LLM summaries
+import hashlib
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.metrics import metrics
+from app.models import Summary
+from app.services.family_service import MemberRecord, get_family_roster
+from app.services.llm_service import GroqLLMService, PROMPT_VERSION
+from app.services.summary_inputs import (
+    FamilyDayStats, MemberDayStats, day_bounds, load_family_day_posts, load_family_day_stats,
+    load_member_day_items, load_member_day_stats
+)
+
+
+@dataclass(frozen=True)
+class SummaryKey:
+    kind: str  # "family" or "user"
+    family_id: UUID
+    summary_date: date
+    model: str
+    subject_id: Optional[UUID] = None
+    viewer_id: Optional[UUID] = None
+
+    def filters(self):
+        return [
+            Summary.kind == self.kind,
+            Summary.family_id == self.family_id,
+            Summary.summary_date == self.summary_date,
+            Summary.model == self.model,
+            Summary.subject_id == self.subject_id if self.subject_id else Summary.subject_id.is_(None),
+            Summary.viewer_id == self.viewer_id if self.viewer_id else Summary.viewer_id.is_(None),
+        ]
+
+
+def input_fingerprint(*digests: str) -> str:
+    """
+    Fingerprint of a summary's inputs from per-source digests of their
+    (id, version timestamp) rows, e.g. (Post.id, Post.updated_at); see
+    summary_inputs. Summaries from a non-Groq backend (LLM_BACKEND) get
+    their own fingerprints, so they are never served once the real API is
+    in use.
+    """
+    digest = hashlib.sha256(PROMPT_VERSION.encode())
+    if settings.LLM_BACKEND != "groq":
+        digest.update(f"|{settings.LLM_BACKEND}".encode())
+    for source in digests:
+        digest.update(f"|{source}".encode())
+    return digest.hexdigest()
+
+
+def load_summary(db: Session, key: SummaryKey, fingerprint: str) -> Optional[Dict]:
+    """Stored payload for this key, if it was generated from the same inputs"""
+    row = db.query(Summary.fingerprint, Summary.payload).filter(*key.filters()).first()
+    if row is not None and row.fingerprint == fingerprint:
+        metrics.incr(f"summary.store.{key.kind}.hits")
+        return row.payload
+    metrics.incr(f"summary.store.{key.kind}.misses")
+    return None
+
+
+def load_member_summaries(db: Session, keys: Dict[SummaryKey, str]) -> Dict[SummaryKey, Dict]:
+    """
+    Batch load_summary for user summaries that share family, viewer, date
+    and model (one per subject), with one query
+    """
+    if not keys:
+        return {}
+    sample = next(iter(keys))
+    rows = db.query(Summary.subject_id, Summary.fingerprint, Summary.payload).filter(
+        Summary.kind == "user",
+        Summary.family_id == sample.family_id,
+        Summary.viewer_id == sample.viewer_id,
+        Summary.summary_date == sample.summary_date,
+        Summary.model == sample.model,
+        Summary.subject_id.in_([key.subject_id for key in keys])
+    ).all()
+    stored = {row.subject_id: row for row in rows}
+
+    found = {}
+    for key, fingerprint in keys.items():
+        row = stored.get(key.subject_id)
+        if row is not None and row.fingerprint == fingerprint:
+            found[key] = row.payload
+    metrics.incr("summary.store.user.hits", len(found))
+    metrics.incr("summary.store.user.misses", len(keys) - len(found))
+    return found
+
+
+def save_summary(db: Session, key: SummaryKey, fingerprint: str, payload: Dict):
+    """Insert or replace the stored summary for this key and commit"""
+    if key.kind == "family":
+        conflict = dict(index_elements=["family_id", "summary_date", "model"], index_where=text("kind = 'family'"))
+    else:
+        conflict = dict(
+            index_elements=["family_id", "subject_id", "viewer_id", "summary_date", "model"],
+            index_where=text("kind = 'user'")
+        )
+    stmt = pg_insert(Summary).values(
+        id=uuid.uuid4(),
+        kind=key.kind,
+        family_id=key.family_id,
+        subject_id=key.subject_id,
+        viewer_id=key.viewer_id,
+        summary_date=key.summary_date,
+        model=key.model,
+        fingerprint=fingerprint,
+        payload=payload,
+    )
+    stmt = stmt.on_conflict_do_update(
+        **conflict,
+        set_={"fingerprint": stmt.excluded.fingerprint, "payload": stmt.excluded.payload, "updated_at": func.now()}
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def _family_inputs(db: Session, family_id: UUID, target_date: date):
+    """Day stats, stored-summary key and fingerprint for a family summary"""
+    stats = load_family_day_stats(db, family_id, target_date)
+    key = SummaryKey("family", family_id, target_date, GroqLLMService.model)
+    return stats, key, input_fingerprint(stats.digest)
+
+
+def _family_llm_args(db: Session, family_id: UUID, target_date: date) -> Tuple[List[Dict], List[Dict]]:
+    posts_data = [{
+        "content": content,
+        "user": {"username": username},
+        "created_at": created_at.isoformat()
+    } for content, username, created_at in load_family_day_posts(db, family_id, target_date)]
+    users_data = [{"id": str(u.id), "username": u.username} for u in get_family_roster(db, family_id)]
+    return posts_data, users_data
+
+
+def _family_response(summary: str, target_date: date, stats: FamilyDayStats) -> Dict:
+    return {
+        "summary": summary,
+        "total_posts": stats.total_posts,
+        "date": target_date.isoformat(),
+        "users_active": stats.users_active
+    }
+
+
+def build_family_summary(
+    db: Session,
+    family_id: UUID,
+    target_date: date,
+    api_key: str,
+    raise_errors: bool = False
+) -> Dict:
+    """
+    Daily family summary (FamilySummaryResponse fields), reusing the stored
+    summary while the day's posts are unchanged.
+
+    LLM failures are returned as the summary text and not stored, unless
+    raise_errors is set.
+    """
+    stats, key, fingerprint = _family_inputs(db, family_id, target_date)
+
+    stored = load_summary(db, key, fingerprint)
+    if stored is not None:
+        summary = stored["summary"]
+    else:
+        posts_data, users_data = _family_llm_args(db, family_id, target_date)
+        try:
+            summary = GroqLLMService(api_key).summarize_family(posts_data, users_data)
+            save_summary(db, key, fingerprint, {"summary": summary})
+        except Exception as e:
+            if raise_errors:
+                raise
+            summary = f"Error generating summary: {str(e)}"
+
+    return _family_response(summary, target_date, stats)
+
+
+def stream_family_summary(db: Session, family_id: UUID, target_date: date, api_key: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Streaming build_family_summary: yields ("token", {"text"}) events as the
+    summary is generated, then ("done", FamilySummaryResponse fields), or
+    ("error", {"detail"}) if generation fails. A stored summary is sent as
+    a single token event.
+    """
+    stats, key, fingerprint = _family_inputs(db, family_id, target_date)
+
+    stored = load_summary(db, key, fingerprint)
+    if stored is not None:
+        summary = stored["summary"]
+        yield "token", {"text": summary}
+    else:
+        posts_data, users_data = _family_llm_args(db, family_id, target_date)
+        summary = ""
+        try:
+            for delta in GroqLLMService(api_key).stream_family_summary(posts_data, users_data):
+                summary += delta
+                yield "token", {"text": delta}
+        except Exception as e:
+            yield "error", {"detail": f"Error generating summary: {str(e)}"}
+            return
+        save_summary(db, key, fingerprint, {"summary": summary})
+
+    yield "done", _family_response(summary, target_date, stats)
+
+
+def user_fingerprint(stats: MemberDayStats) -> str:
+    return input_fingerprint(stats.post_digest, stats.message_digest)
+
+
+def _user_inputs(db: Session, family_id: UUID, viewer_id: UUID, subject: MemberRecord, target_date: date):
+    """Day stats, stored-summary key and fingerprint for a user summary"""
+    stats = load_member_day_stats(db, family_id, viewer_id, target_date, [subject.id]).get(subject.id, MemberDayStats())
+    key = SummaryKey("user", family_id, target_date, GroqLLMService.model, subject_id=subject.id, viewer_id=viewer_id)
+    return stats, key, user_fingerprint(stats)
+
+
+def user_llm_args(posts, messages) -> Tuple[List[Dict], List[Dict]]:
+    """LLM arguments from load_member_day_items rows for one member"""
+    posts_data = [{
+        "content": content,
+        "created_at": created_at.isoformat(),
+        "reactions": reactions
+    } for content, created_at, reactions in posts]
+    messages_data = [{
+        "content": content,
+        "created_at": created_at.isoformat()
+    } for content, created_at in messages]
+    return posts_data, messages_data
+
+
+def _user_llm_args(db: Session, family_id: UUID, viewer_id: UUID, subject: MemberRecord, target_date: date):
+    posts, messages = load_member_day_items(db, family_id, viewer_id, target_date, [subject.id])
+    return user_llm_args(posts[subject.id], messages[subject.id])
+
+
+def user_messages_with_you(stats: MemberDayStats) -> Optional[Dict]:
+    if not stats.messages:
+        return None
+    return {
+        "count": stats.messages,
+        "summary": f"You exchanged {stats.messages} messages today."
+    }
+
+
+def _user_response(subject: MemberRecord, target_date: date, result: Dict, stats: MemberDayStats) -> Dict:
+    return {
+        "user_id": subject.id,
+        "username": subject.username,
+        "date": target_date.isoformat(),
+        "post_summary": result["post_summary"],
+        "sentiment": result["sentiment"],
+        "posts_count": stats.posts,
+        "messages_with_you": user_messages_with_you(stats)
+    }
+
+
+def build_user_summary(
+    db: Session,
+    family_id: UUID,
+    viewer_id: UUID,
+    subject: MemberRecord,
+    target_date: date,
+    api_key: str,
+    raise_errors: bool = False
+) -> Dict:
+    """
+    A member's daily summary and sentiment as seen by viewer_id
+    (UserSummaryResponse fields), including their messages with each other.
+    Stored and reused like build_family_summary.
+    """
+    stats, key, fingerprint = _user_inputs(db, family_id, viewer_id, subject, target_date)
+
+    result = load_summary(db, key, fingerprint)
+    if result is None:
+        posts_data, messages_data = _user_llm_args(db, family_id, viewer_id, subject, target_date)
+        try:
+            result = GroqLLMService(api_key).summarize_user(posts_data, messages_data)
+            save_summary(db, key, fingerprint, result)
+        except Exception as e:
+            if raise_errors:
+                raise
+            result = {
+                "post_summary": f"Error analyzing: {str(e)}",
+                "sentiment": "Unable to analyze sentiment at this time."
+            }
+
+    return _user_response(subject, target_date, result, stats)
+
+
+def stream_user_summary(
+    db: Session,
+    family_id: UUID,
+    viewer_id: UUID,
+    subject: MemberRecord,
+    target_date: date,
+    api_key: str
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Streaming build_user_summary: yields ("post_summary", {"text"}) and
+    ("sentiment", {"text"}) deltas as each section is generated, then
+    ("done", UserSummaryResponse fields), or ("error", {"detail"}). The done
+    event carries the authoritative parsed result.
+    """
+    stats, key, fingerprint = _user_inputs(db, family_id, viewer_id, subject, target_date)
+
+    result = load_summary(db, key, fingerprint)
+    if result is not None:
+        yield "post_summary", {"text": result["post_summary"]}
+        yield "sentiment", {"text": result["sentiment"]}
+    else:
+        posts_data, messages_data = _user_llm_args(db, family_id, viewer_id, subject, target_date)
+        try:
+            for section, value in GroqLLMService(api_key).stream_user_summary(posts_data, messages_data):
+                if section == "done":
+                    result = value
+                else:
+                    yield section, {"text": value}
+        except Exception as e:
+            yield "error", {"detail": f"Error generating user summary: {str(e)}"}
+            return
+        save_summary(db, key, fingerprint, result)
+
+    yield "done", _user_response(subject, target_date, result, stats)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Load Test
+
+Replays a scripted mix of user sessions against a running backend: login,
+feed scrolling, comments and reactions, messaging, search, and family and
+member summaries. Each virtual user logs in as one of the users created by
+bench/seed_data.py and then picks weighted actions with exponential think
+time until --duration runs out. Latency percentiles (p50/p95/p99), error
+counts and requests per second are reported per route and written as JSON
+so runs can be compared.
+
+Start the server with the fake LLM backend, so summaries exercise the
+full path without calling Groq:
+
+    LLM_BACKEND=fake uvicorn app.main:app --workers 4
+    python bench/seed_data.py --users 1000
+    python bench/load_test.py --vus 50 --duration 120 --output load_test.json
+"""
+
+import argparse
+import json
+import math
+import random
+import string
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+
+WORDS = [
+    "birthday", "dinner", "grandma", "soccer", "school", "vacation", "beach", "garden",
+    "cookies", "holiday", "graduation", "puppy", "weekend", "picnic", "happy", "pancakes",
+    "Margaret", "Aisha", "graduaton", "thanksgving",
+]
+
+# Any key works with LLM_BACKEND=fake
+SUMMARY_REQUEST = {"groq_api_key": "load-test"}
+
+# Relative frequency of each action in a session
+ACTIONS = {
+    "feed": 30,
+    "comments": 10,
+    "react": 12,
+    "comment": 4,
+    "post": 3,
+    "conversations": 8,
+    "conversation": 8,
+    "send_message": 6,
+    "unread": 5,
+    "search": 8,
+    "typeahead": 3,
+    "me": 3,
+    "family_summary": 2,
+    "user_summary": 2,
+    "login": 1,
+}
+
+
+class Recorder:
+    """Latencies and errors per route, shared by all virtual users"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route: str, ms: float, ok: bool):
+        with self._lock:
+            self.latencies[route].append(ms)
+            if not ok:
+                self.errors[route] += 1
+
+
+class VirtualUser:
+    def __init__(self, base_url: str, username: str, password: str, recorder: Recorder, rng: random.Random, timeout: float):
+        self.client = httpx.Client(base_url=base_url, timeout=timeout)
+        self.username = username
+        self.password = password
+        self.recorder = recorder
+        self.rng = rng
+        self.family_id = None
+        self.user_id = None
+        self.members = []
+        self.post_ids = []
+        self.reacted = set()  # Posts this user has reacted to, so removing a reaction can't 404
+
+    def request(self, method: str, route: str, path: str, **kwargs):
+        """Send a request and record it under its route template; returns the response or None"""
+        started = time.perf_counter()
+        try:
+            response = self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(route, (time.perf_counter() - started) * 1000, False)
+            return None
+        self.recorder.record(route, (time.perf_counter() - started) * 1000, response.is_success)
+        return response if response.is_success else None
+
+    def login(self) -> bool:
+        response = self.request(
+            "POST", "POST /api/auth/login", "/api/auth/login",
+            data={"username": self.username, "password": self.password}
+        )
+        if response is None:
+            return False
+        body = response.json()
+        self.client.headers["Authorization"] = f"Bearer {body['access_token']}"
+        if not body.get("selected_family"):
+            return False
+        self.family_id = body["selected_family"]["id"]
+
+        me = self.request("GET", "GET /api/auth/me", "/api/auth/me")
+        members = self.request("GET", "GET /api/family/{family_id}/members", f"/api/family/{self.family_id}/members")
+        if me is None or members is None:
+            return False
+        self.user_id = me.json()["id"]
+        self.members = [m["id"] for m in members.json() if m["id"] != self.user_id]
+        return True
+
+    def run(self, deadline: float, think_ms: float):
+        actions = list(ACTIONS)
+        weights = list(ACTIONS.values())
+        try:
+            if not self.login():
+                return
+            while time.monotonic() < deadline:
+                getattr(self, f"do_{self.rng.choices(actions, weights)[0]}")()
+                if think_ms > 0:
+                    time.sleep(min(self.rng.expovariate(1000 / think_ms), max(0.0, deadline - time.monotonic())))
+        finally:
+            self.client.close()
+
+    def do_feed(self):
+        # Scroll a few pages; later actions pick posts from what was seen
+        for page in range(self.rng.randint(1, 4)):
+            response = self.request("GET", "GET /api/posts", "/api/posts", params={"skip": page * 20, "limit": 20})
+            if response is None:
+                return
+            posts = response.json()
+            self.post_ids = (self.post_ids + [p["id"] for p in posts])[-200:]
+            if len(posts) < 20:
+                return
+
+    def _seen_post(self):
+        return self.rng.choice(self.post_ids) if self.post_ids else None
+
+    def do_comments(self):
+        post_id = self._seen_post()
+        if post_id:
+            self.request("GET", "GET /api/posts/{post_id}/comments", f"/api/posts/{post_id}/comments")
+
+    def do_react(self):
+        post_id = self._seen_post()
+        if not post_id:
+            return
+        roll = self.rng.random()
+        if roll < 0.1 and post_id in self.reacted:
+            if self.request("DELETE", "DELETE /api/posts/{post_id}/reaction", f"/api/posts/{post_id}/reaction") is not None:
+                self.reacted.discard(post_id)
+            return
+        reaction = "like" if roll < 0.9 else "dislike"
+        if self.request("POST", f"POST /api/posts/{{post_id}}/{reaction}", f"/api/posts/{post_id}/{reaction}") is not None:
+            self.reacted.add(post_id)
+
+    def do_comment(self):
+        post_id = self._seen_post()
+        if post_id:
+            self.request("POST", "POST /api/posts/{post_id}/comments", f"/api/posts/{post_id}/comments",
+                         json={"content": self._sentence(3, 15)})
+
+    def do_post(self):
+        response = self.request("POST", "POST /api/posts", "/api/posts", json={"content": self._sentence(5, 40)})
+        if response is not None:
+            self.post_ids.append(response.json()["id"])
+
+    def do_conversations(self):
+        self.request("GET", "GET /api/messages", "/api/messages")
+
+    def do_conversation(self):
+        if self.members:
+            member = self.rng.choice(self.members)
+            self.request("GET", "GET /api/messages/{user_id}", f"/api/messages/{member}")
+
+    def do_send_message(self):
+        if self.members:
+            self.request("POST", "POST /api/messages", "/api/messages",
+                         json={"recipient_id": self.rng.choice(self.members), "content": self._sentence(2, 20)})
+
+    def do_unread(self):
+        self.request("GET", "GET /api/messages/unread-count", "/api/messages/unread-count")
+
+    def do_search(self):
+        mode = self.rng.choices(["fulltext", "substring", "fuzzy"], [6, 2, 2])[0]
+        self.request("GET", f"GET /api/search ({mode})", "/api/search",
+                     params={"q": self.rng.choice(WORDS), "mode": mode, "limit": 20})
+
+    def do_typeahead(self):
+        prefix = self.rng.choice(string.ascii_lowercase) + self.rng.choice(string.ascii_lowercase)
+        self.request("GET", "GET /api/search/typeahead", "/api/search/typeahead", params={"q": prefix})
+
+    def do_me(self):
+        self.request("GET", "GET /api/auth/me?include_families", "/api/auth/me", params={"include_families": "true"})
+
+    def do_family_summary(self):
+        self.request("POST", "POST /api/family/summary", "/api/family/summary", json=SUMMARY_REQUEST)
+
+    def do_user_summary(self):
+        if self.members:
+            member = self.rng.choice(self.members)
+            self.request("POST", "POST /api/family/users/{user_id}/summary",
+                         f"/api/family/users/{member}/summary", json=SUMMARY_REQUEST)
+
+    def do_login(self):
+        self.login()
+
+    def _sentence(self, low: int, high: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(low, high)))
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[route],
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    return routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a realistic request mix and report latency per route")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--vus", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    parser.add_argument("--think-ms", type=float, default=500, help="Mean pause between a user's actions (0 = none)")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--seeded-users", type=int, default=1000, help="--users given to seed_data.py")
+    parser.add_argument("--prefix", default="lt", help="--prefix given to seed_data.py")
+    parser.add_argument("--password", default="loadtest", help="--password given to seed_data.py")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    user_numbers = rng.sample(range(args.seeded_users), min(args.vus, args.seeded_users))
+    users = [
+        VirtualUser(args.base_url, f"{args.prefix}_user_{i:06d}", args.password, recorder,
+                    random.Random(rng.getrandbits(64)), args.timeout)
+        for i in user_numbers
+    ]
+
+    print(f"⏱️  {len(users)} virtual users for {args.duration:.0f}s against {args.base_url}")
+    started = time.perf_counter()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=user.run, args=(deadline, args.think_ms), name=f"vu-{i}", daemon=True)
+        for i, user in enumerate(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = summarize(recorder, elapsed)
+    total_requests = sum(r["requests"] for r in routes.values())
+    total_errors = sum(r["errors"] for r in routes.values())
+    for route, r in routes.items():
+        print(f"{route:48} n={r['requests']:>6} err={r['errors']:>4} rps={r['rps']:>7.2f} "
+              f"p50={r['p50_ms']:>8.1f}ms p95={r['p95_ms']:>8.1f}ms p99={r['p99_ms']:>8.1f}ms")
+    print(f"\n✓ {total_requests} requests, {total_errors} errors in {elapsed:.1f}s ({total_requests / elapsed:.1f} req/s)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "config": {
+                    "base_url": args.base_url,
+                    "vus": len(users),
+                    "duration_s": args.duration,
+                    "think_ms": args.think_ms,
+                    "seed": args.seed,
+                    "actions": ACTIONS,
+                },
+                "elapsed_s": round(elapsed, 3),
+                "requests": total_requests,
+                "errors": total_errors,
+                "rps": round(total_requests / elapsed, 2),
+                "routes": routes,
+            }, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Search Benchmark
+
+Compares the legacy `lower(content) LIKE '%q%'` scan with the trigram-indexed
+substring path, fuzzy word similarity and full-text search on a single large
+family (1M posts by default).
+
+The benchmark family is seeded server-side with generate_series, so seeding
+1M posts takes about a minute. Run against a disposable database with the
+migrations applied (alembic upgrade head):
+
+    python bench/search_benchmark.py --posts 1000000 --runs 10 --output search_bench.json
+    python bench/search_benchmark.py --cleanup
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database import engine
+
+BENCH_FAMILY = "bench-search"
+BENCH_USER = "bench_search_user"
+
+WORDS = [
+    "birthday", "dinner", "grandma", "grandpa", "soccer", "school", "vacation", "beach",
+    "garden", "cookies", "holiday", "recital", "graduation", "puppy", "weekend", "picnic",
+    "happy", "tired", "proud", "excited", "rainy", "sunny", "pancakes", "movie", "hiking",
+    "Margaret", "Rohan", "Aisha", "Tomasz", "🎉", "❤️", "😂", "thanksgiving", "wedding",
+]
+
+QUERIES = {
+    "common_word": "happy",
+    "name_fragment": "garet",
+    "rare_word": "tomasz",
+    "emoji": "🎉",
+    "misspelling": "graduaton",
+}
+
+STRATEGIES = {
+    "legacy_like_scan": """
+        SELECT id FROM posts
+        WHERE family_id = :family_id AND lower(content) LIKE :pattern
+        ORDER BY created_at DESC LIMIT 50
+    """,
+    "trigram_substring": """
+        SELECT id FROM posts
+        WHERE family_id = :family_id AND content ILIKE :pattern
+        ORDER BY created_at DESC LIMIT 50
+    """,
+    "trigram_fuzzy": """
+        SELECT id FROM posts
+        WHERE family_id = :family_id AND :q <% content
+        ORDER BY word_similarity(:q, content) DESC, created_at DESC LIMIT 50
+    """,
+    "fulltext": """
+        SELECT id FROM posts
+        WHERE family_id = :family_id AND search_vector @@ plainto_tsquery('english', :q)
+        ORDER BY ts_rank_cd(search_vector, plainto_tsquery('english', :q)) DESC, created_at DESC LIMIT 50
+    """,
+}
+
+
+def seed(conn, posts: int):
+    """Create the benchmark family with `posts` posts unless it already exists"""
+    family_id = conn.execute(text("SELECT id FROM families WHERE name = :name"), {"name": BENCH_FAMILY}).scalar()
+    if family_id:
+        existing = conn.execute(text("SELECT count(*) FROM posts WHERE family_id = :f"), {"f": family_id}).scalar()
+        print(f"✓ Using existing benchmark family with {existing} posts")
+        return family_id
+
+    print(f"🔨 Seeding {posts} posts...")
+    started = time.perf_counter()
+    family_id = conn.execute(text(
+        "INSERT INTO families (id, name) VALUES (gen_random_uuid(), :name) RETURNING id"
+    ), {"name": BENCH_FAMILY}).scalar()
+    user_id = conn.execute(text("""
+        INSERT INTO users (id, username, email, password_hash)
+        VALUES (gen_random_uuid(), :username, :email, 'x') RETURNING id
+    """), {"username": BENCH_USER, "email": f"{BENCH_USER}@example.com"}).scalar()
+    conn.execute(text(
+        "INSERT INTO user_families (id, user_id, family_id) VALUES (gen_random_uuid(), :u, :f)"
+    ), {"u": user_id, "f": family_id})
+    conn.execute(text("""
+        INSERT INTO posts (id, user_id, family_id, content, created_at, likes_count, dislikes_count, comments_count)
+        SELECT gen_random_uuid(), :u, :f,
+               (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+                FROM generate_series(1, 8 + (g % 20)), (SELECT CAST(:words AS text[]) AS w) words),
+               now() - (g || ' seconds')::interval, 0, 0, 0
+        FROM generate_series(1, :n) AS g
+    """), {"u": user_id, "f": family_id, "n": posts, "words": WORDS})
+    conn.execute(text("ANALYZE posts"))
+    print(f"✓ Seeded in {time.perf_counter() - started:.1f}s")
+    return family_id
+
+
+def cleanup(conn):
+    family_id = conn.execute(text("SELECT id FROM families WHERE name = :name"), {"name": BENCH_FAMILY}).scalar()
+    if not family_id:
+        print("Nothing to clean up")
+        return
+    conn.execute(text("DELETE FROM posts WHERE family_id = :f"), {"f": family_id})
+    conn.execute(text("DELETE FROM user_families WHERE family_id = :f"), {"f": family_id})
+    conn.execute(text("DELETE FROM users WHERE username = :u"), {"u": BENCH_USER})
+    conn.execute(text("DELETE FROM families WHERE id = :f"), {"f": family_id})
+    print("✓ Benchmark data removed")
+
+
+def time_query(conn, sql: str, params: dict, runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = conn.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    plan = conn.execute(text("EXPLAIN " + sql), params).fetchall()
+    return {
+        "rows": len(rows),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "max_ms": round(timings[-1], 2),
+        "indexes": sorted(set(re.findall(r"on (ix_\w+)", "\n".join(line[0] for line in plan)))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark post search strategies")
+    parser.add_argument("--posts", type=int, default=1_000_000, help="Posts to seed in the benchmark family")
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per query and strategy")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--cleanup", action="store_true", help="Remove the benchmark family and exit")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.cleanup:
+            cleanup(conn)
+            return
+        family_id = seed(conn, args.posts)
+
+    results = {}
+    with engine.connect() as conn:
+        conn.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', '0.5', false)"))
+        for query_name, q in QUERIES.items():
+            params = {"family_id": family_id, "q": q, "pattern": f"%{q.lower()}%"}
+            results[query_name] = {}
+            for strategy, sql in STRATEGIES.items():
+                results[query_name][strategy] = time_query(conn, sql, params, args.runs)
+                r = results[query_name][strategy]
+                print(f"{query_name:15} {strategy:20} p50={r['p50_ms']:>9.2f}ms "
+                      f"p95={r['p95_ms']:>9.2f}ms rows={r['rows']:>3} indexes={','.join(r['indexes']) or '-'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"posts": args.posts, "runs": args.runs, "results": results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
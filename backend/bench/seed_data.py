@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Load Test Dataset Seeder
+
+Fills the database with a synthetic, skewed dataset for bench/load_test.py:
+family sizes follow a Zipf-like distribution (many small families, a few
+large ones), a minority of members write most posts, a few posts draw most
+comments and reactions, and posts skew towards recent days. Rows are
+generated in Python from --seed (same options, same dataset) and loaded
+with COPY in batches, in one transaction.
+
+All seeded users share the password --password. Usernames, emails and
+family names start with --prefix, which is how --cleanup finds them.
+Run against a disposable database with the migrations applied
+(alembic upgrade head):
+
+    python bench/seed_data.py --families 200 --users 2000 --posts 200000 \\
+        --comments 400000 --reactions 1000000 --messages 300000
+    python bench/seed_data.py --cleanup
+"""
+
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.auth import get_password_hash
+from app.database import engine
+
+WORDS = [
+    "birthday", "dinner", "grandma", "grandpa", "soccer", "school", "vacation", "beach",
+    "garden", "cookies", "holiday", "recital", "graduation", "puppy", "weekend", "picnic",
+    "happy", "tired", "proud", "excited", "rainy", "sunny", "pancakes", "movie", "hiking",
+    "Margaret", "Rohan", "Aisha", "Tomasz", "🎉", "❤️", "😂", "thanksgiving", "wedding",
+    "the", "and", "we", "had", "so", "much", "fun", "today", "with", "everyone", "at", "home",
+]
+
+COPY_BATCH_ROWS = 50_000
+
+
+class CopyWriter:
+    """Buffers CSV rows for one table and flushes them with COPY every COPY_BATCH_ROWS"""
+
+    def __init__(self, cursor, table: str, columns: list):
+        self.cursor = cursor
+        self.sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        self.table = table
+        self.rows = 0
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = 0
+
+    def write(self, *row):
+        self._writer.writerow(row)
+        self._pending += 1
+        self.rows += 1
+        if self._pending >= COPY_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._buffer.seek(0)
+            self.cursor.copy_expert(self.sql, self._buffer)
+            self._buffer = io.StringIO()
+            self._writer = csv.writer(self._buffer)
+            self._pending = 0
+
+
+def skewed_weights(rng: random.Random, n: int, alpha: float) -> list:
+    """Cumulative Pareto weights: a few items get most of the mass"""
+    return list(itertools.accumulate(rng.paretovariate(alpha) for _ in range(n)))
+
+
+def pick(rng: random.Random, items: list, cum_weights: list):
+    return items[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def recent_time(rng: random.Random, now: datetime, days: int) -> datetime:
+    """A time in the last `days` days, denser towards now"""
+    return now - timedelta(seconds=days * 86400 * rng.random() ** 2)
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+
+    def new_id() -> uuid.UUID:
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    now = datetime.now(timezone.utc)
+    password_hash = get_password_hash(args.password)
+
+    # Family sizes: Zipf-like, at least 2 members; every user joins one
+    # family, and --multi-family of them join a second one
+    family_ids = [new_id() for _ in range(args.families)]
+    zipf = list(itertools.accumulate(1 / (rank + 1) ** args.family_skew for rank in range(args.families)))
+    user_ids = [new_id() for _ in range(args.users)]
+    members = {family_id: [] for family_id in family_ids}
+    for i, user_id in enumerate(user_ids):
+        family_id = family_ids[i // 2] if i < 2 * args.families else pick(rng, family_ids, zipf)
+        members[family_id].append(user_id)
+        if rng.random() < args.multi_family:
+            second = pick(rng, family_ids, zipf)
+            if user_id not in members[second]:
+                members[second].append(user_id)
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        started = time.perf_counter()
+
+        families = CopyWriter(cursor, "families", ["id", "name", "created_at"])
+        for i, family_id in enumerate(family_ids):
+            families.write(family_id, f"{args.prefix}-family-{i:05d}", now - timedelta(days=args.days))
+        families.flush()
+
+        users = CopyWriter(cursor, "users", ["id", "username", "email", "password_hash", "full_name", "created_at"])
+        for i, user_id in enumerate(user_ids):
+            username = f"{args.prefix}_user_{i:06d}"
+            users.write(
+                user_id, username, f"{username}@example.com", password_hash,
+                f"{rng.choice(WORDS).title()} {args.prefix.title()}{i}", now - timedelta(days=args.days)
+            )
+        users.flush()
+
+        memberships = []
+        user_families = CopyWriter(cursor, "user_families", ["id", "user_id", "family_id", "joined_at"])
+        for family_id, family_members in members.items():
+            for user_id in family_members:
+                user_families.write(new_id(), user_id, family_id, now - timedelta(days=args.days))
+                memberships.append((user_id, family_id))
+        user_families.flush()
+        print(f"✓ {families.rows} families, {users.rows} users, {user_families.rows} memberships")
+
+        # Posts: heavy posters write most of them
+        author_weights = skewed_weights(rng, len(memberships), args.activity_skew)
+        posts = []  # (id, family_id, created_at)
+        post_rows = []
+        for _ in range(args.posts):
+            user_id, family_id = pick(rng, memberships, author_weights)
+            created_at = recent_time(rng, now, args.days)
+            post_id = new_id()
+            posts.append((post_id, family_id, created_at))
+            post_rows.append([post_id, user_id, family_id, sentence(rng, 4, 60), created_at, 0, 0, 0])
+
+        # Comments and reactions: popular posts draw most of them
+        popularity = skewed_weights(rng, len(posts), args.activity_skew)
+        post_index = list(range(len(posts)))
+        comments = CopyWriter(cursor, "comments", ["id", "post_id", "user_id", "content", "created_at"])
+        comment_rows = []
+        for _ in range(args.comments if posts else 0):
+            i = pick(rng, post_index, popularity)
+            post_id, family_id, created_at = posts[i]
+            comment_rows.append((
+                new_id(), post_id, rng.choice(members[family_id]), sentence(rng, 2, 25),
+                min(now, created_at + timedelta(minutes=rng.expovariate(1 / 120)))
+            ))
+            post_rows[i][7] += 1
+
+        reaction_rows = []
+        reacted = set()
+        for _ in range(args.reactions if posts else 0):
+            i = pick(rng, post_index, popularity)
+            post_id, family_id, created_at = posts[i]
+            user_id = rng.choice(members[family_id])
+            if (post_id, user_id) in reacted:
+                continue  # One reaction per member and post
+            reacted.add((post_id, user_id))
+            like = rng.random() < 0.9
+            reaction_rows.append((
+                new_id(), post_id, user_id, "LIKE" if like else "DISLIKE",
+                min(now, created_at + timedelta(minutes=rng.expovariate(1 / 60)))
+            ))
+            post_rows[i][5 if like else 6] += 1
+        del reacted
+
+        # Posts first (with their final counters), then what references them
+        post_writer = CopyWriter(cursor, "posts", [
+            "id", "user_id", "family_id", "content", "created_at", "likes_count", "dislikes_count", "comments_count"
+        ])
+        for row in post_rows:
+            post_writer.write(*row)
+        post_writer.flush()
+        del post_rows
+        for row in comment_rows:
+            comments.write(*row)
+        comments.flush()
+        del comment_rows
+        reactions = CopyWriter(cursor, "post_reactions", ["id", "post_id", "user_id", "reaction_type", "created_at"])
+        for row in reaction_rows:
+            reactions.write(*row)
+        reactions.flush()
+        del reaction_rows
+        print(f"✓ {post_writer.rows} posts, {comments.rows} comments, {reactions.rows} reactions")
+
+        # Messages: larger families talk more, and a few members in each do most of it
+        chat_families = [family_id for family_id in family_ids if len(members[family_id]) >= 2]
+        chat_weights = list(itertools.accumulate(len(members[family_id]) ** 1.5 for family_id in chat_families))
+        messages = CopyWriter(cursor, "messages", [
+            "id", "sender_id", "recipient_id", "family_id", "content", "is_read", "created_at"
+        ])
+        for _ in range(args.messages):
+            family_id = pick(rng, chat_families, chat_weights)
+            family_members = members[family_id]
+            sender = family_members[int(len(family_members) * rng.random() ** 2)]
+            recipient = rng.choice(family_members)
+            while recipient == sender:
+                recipient = rng.choice(family_members)
+            created_at = recent_time(rng, now, args.days)
+            is_read = now - created_at > timedelta(hours=6) or rng.random() < 0.5
+            messages.write(new_id(), sender, recipient, family_id, sentence(rng, 2, 30), is_read, created_at)
+        messages.flush()
+        print(f"✓ {messages.rows} messages")
+
+        raw.commit()
+        print(f"✓ Loaded in {time.perf_counter() - started:.1f}s")
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("families", "users", "user_families", "posts", "comments", "post_reactions", "messages"):
+            conn.execute(text(f"ANALYZE {table}"))
+
+
+def cleanup(prefix: str):
+    family_names = f"{prefix}-family-%"
+    usernames = f"{prefix}\\_user\\_%"
+    with engine.begin() as conn:
+        families = "SELECT id FROM families WHERE name LIKE :families"
+        posts = f"SELECT id FROM posts WHERE family_id IN ({families})"
+        params = {"families": family_names, "users": usernames}
+        conn.execute(text(f"DELETE FROM post_reactions WHERE post_id IN ({posts})"), params)
+        conn.execute(text(f"DELETE FROM comments WHERE post_id IN ({posts})"), params)
+        for table in ("summaries", "summary_jobs", "messages", "posts", "user_families"):
+            conn.execute(text(f"DELETE FROM {table} WHERE family_id IN ({families})"), params)
+        conn.execute(text("DELETE FROM users WHERE username LIKE :users"), params)
+        conn.execute(text("DELETE FROM families WHERE name LIKE :families"), params)
+    print("✓ Seeded data removed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a skewed synthetic dataset for load testing")
+    parser.add_argument("--families", type=int, default=100)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=50_000)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--reactions", type=int, default=200_000, help="Upper bound; duplicates per member and post are skipped")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30, help="Spread activity over this many days")
+    parser.add_argument("--family-skew", type=float, default=1.1, help="Zipf exponent of family sizes")
+    parser.add_argument("--activity-skew", type=float, default=1.2, help="Pareto alpha of poster and post activity (lower = more skewed)")
+    parser.add_argument("--multi-family", type=float, default=0.1, help="Share of users in a second family")
+    parser.add_argument("--password", default="loadtest", help="Password of every seeded user")
+    parser.add_argument("--prefix", default="lt", help="Prefix of seeded usernames and family names")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cleanup", action="store_true", help="Remove seeded data and exit")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup(args.prefix)
+        return
+    if args.users < 2 * args.families:
+        parser.error("--users must be at least twice --families (every family gets 2 members)")
+
+    with engine.connect() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM families WHERE name LIKE :name"),
+                                {"name": f"{args.prefix}-family-%"}).scalar()
+    if existing:
+        print(f"Found {existing} seeded families; run with --cleanup first")
+        return
+    seed(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Summary Benchmark
+
+Measures end-to-end latency and throughput of the family summary endpoints
+with the fake LLM backend (LLM_BACKEND=fake), so no Groq key or network
+access is needed. Requests go through the app in-process (FastAPI
+TestClient): auth, queries, prompt building, LLM calls and serialization.
+
+A benchmark family with --members members is seeded with today's posts and
+messages on first run. Each round requests the family summary and every
+member's summary, as the viewer (the first member) would:
+
+    --no-cache   delete stored summaries and cached chunk summaries before
+                 each request, so every request calls the LLM
+    --batch      one POST /summary/members per round instead of one request
+                 per member
+    --stream     the Server-Sent Events endpoints; also reports time to the
+                 first event
+
+Run against a disposable database with the migrations applied
+(alembic upgrade head):
+
+    python bench/summary_benchmark.py --rounds 20 --concurrency 4 --output summary_bench.json
+    python bench/summary_benchmark.py --no-cache --stream --latency-ms 800 --tokens-per-second 100
+    python bench/summary_benchmark.py --cleanup
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.auth import create_access_token
+from app.config import settings
+from app.database import engine
+from app.main import app
+from app.metrics import metrics
+from app.services.llm_service import chunk_cache
+from app.services.summary_inputs import day_bounds
+
+BENCH_FAMILY = "bench-summary"
+BENCH_USER_PREFIX = "bench_summary_user_"
+
+WORDS = [
+    "birthday", "dinner", "grandma", "grandpa", "soccer", "school", "vacation", "beach",
+    "garden", "cookies", "holiday", "recital", "graduation", "puppy", "weekend", "picnic",
+    "happy", "tired", "proud", "excited", "rainy", "sunny", "pancakes", "movie", "hiking",
+    "Margaret", "Rohan", "Aisha", "Tomasz", "🎉", "❤️", "😂", "thanksgiving", "wedding",
+]
+
+
+def seed(conn, members: int, posts: int, messages: int):
+    """
+    Create the benchmark family unless it exists, and give it `posts` posts
+    and `messages` messages today if it has none yet. Posts are skewed
+    towards the first members; messages are between the viewer and the rest.
+    Returns (family_id, member ids), the viewer first.
+    """
+    family_id = conn.execute(text("SELECT id FROM families WHERE name = :name"), {"name": BENCH_FAMILY}).scalar()
+    if not family_id:
+        print(f"🔨 Creating benchmark family with {members} members...")
+        family_id = conn.execute(text(
+            "INSERT INTO families (id, name) VALUES (gen_random_uuid(), :name) RETURNING id"
+        ), {"name": BENCH_FAMILY}).scalar()
+        for i in range(members):
+            username = f"{BENCH_USER_PREFIX}{i}"
+            user_id = conn.execute(text("""
+                INSERT INTO users (id, username, email, password_hash)
+                VALUES (gen_random_uuid(), :username, :email, 'x') RETURNING id
+            """), {"username": username, "email": f"{username}@example.com"}).scalar()
+            conn.execute(text(
+                "INSERT INTO user_families (id, user_id, family_id) VALUES (gen_random_uuid(), :u, :f)"
+            ), {"u": user_id, "f": family_id})
+
+    member_ids = [str(row[0]) for row in conn.execute(text("""
+        SELECT u.id FROM users u JOIN user_families uf ON uf.user_id = u.id
+        WHERE uf.family_id = :f ORDER BY u.username
+    """), {"f": family_id})]
+    if len(member_ids) < 2:
+        raise SystemExit("The benchmark family needs at least 2 members; run --cleanup and reseed")
+
+    day_start, _ = day_bounds(date.today())
+    existing = conn.execute(text(
+        "SELECT count(*) FROM posts WHERE family_id = :f AND created_at >= :start"
+    ), {"f": family_id, "start": day_start}).scalar()
+    if existing:
+        print(f"✓ Using existing benchmark family with {existing} posts today")
+        return family_id, member_ids
+
+    print(f"🔨 Seeding {posts} posts and {messages} messages for today...")
+    started = time.perf_counter()
+    params = {"f": family_id, "users": member_ids, "m": len(member_ids), "start": day_start, "words": WORDS}
+    conn.execute(text("""
+        INSERT INTO posts (id, user_id, family_id, content, created_at, likes_count, dislikes_count, comments_count)
+        SELECT gen_random_uuid(),
+               (CAST(:users AS uuid[]))[1 + floor(power(random(), 2) * :m)::int],
+               :f,
+               (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+                FROM generate_series(1, 8 + (g % 40)), (SELECT CAST(:words AS text[]) AS w) words),
+               CAST(:start AS timestamp) + (g * 86000 / :n || ' seconds')::interval,
+               floor(power(random(), 4) * 30)::int, 0, floor(power(random(), 4) * 10)::int
+        FROM generate_series(1, :n) AS g
+    """), {**params, "n": posts})
+    conn.execute(text("""
+        INSERT INTO messages (id, sender_id, recipient_id, family_id, content, is_read, created_at)
+        SELECT gen_random_uuid(),
+               CASE WHEN g % 2 = 0 THEN viewer ELSE other END,
+               CASE WHEN g % 2 = 0 THEN other ELSE viewer END,
+               :f,
+               (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+                FROM generate_series(1, 4 + (g % 12)), (SELECT CAST(:words AS text[]) AS w) words),
+               false,
+               CAST(:start AS timestamp) + (g * 86000 / :n || ' seconds')::interval
+        FROM generate_series(1, :n) AS g,
+             LATERAL (SELECT (CAST(:users AS uuid[]))[1] AS viewer,
+                             (CAST(:users AS uuid[]))[2 + floor(random() * (:m - 1))::int] AS other) pair
+    """), {**params, "n": messages})
+    conn.execute(text("ANALYZE posts"))
+    conn.execute(text("ANALYZE messages"))
+    print(f"✓ Seeded in {time.perf_counter() - started:.1f}s")
+    return family_id, member_ids
+
+
+def cleanup(conn):
+    family_id = conn.execute(text("SELECT id FROM families WHERE name = :name"), {"name": BENCH_FAMILY}).scalar()
+    if not family_id:
+        print("Nothing to clean up")
+        return
+    for table in ("summaries", "summary_jobs", "messages", "posts", "user_families"):
+        conn.execute(text(f"DELETE FROM {table} WHERE family_id = :f"), {"f": family_id})
+    conn.execute(text("DELETE FROM users WHERE username LIKE :prefix"), {"prefix": f"{BENCH_USER_PREFIX}%"})
+    conn.execute(text("DELETE FROM families WHERE id = :f"), {"f": family_id})
+    print("✓ Benchmark data removed")
+
+
+def clear_caches(family_id):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM summaries WHERE family_id = :f"), {"f": family_id})
+    chunk_cache.clear()
+
+
+def timed_request(client: TestClient, path: str, headers: dict, body: dict, stream: bool) -> dict:
+    """Time one request; streamed responses are read to the end"""
+    started = time.perf_counter()
+    first_event_ms = None
+    if stream:
+        with client.stream("POST", path, headers=headers, json=body) as response:
+            for line in response.iter_lines():
+                if first_event_ms is None and line.startswith("event:"):
+                    first_event_ms = (time.perf_counter() - started) * 1000
+    else:
+        response = client.post(path, headers=headers, json=body)
+    return {
+        "ms": (time.perf_counter() - started) * 1000,
+        "first_event_ms": first_event_ms,
+        "ok": response.status_code == 200,
+    }
+
+
+def run_round(client: TestClient, family_id, member_ids, headers: dict, args) -> list:
+    """Family summary plus every member's summary; returns (route, timing) pairs"""
+    body = {"groq_api_key": "bench", "date": date.today().isoformat()}
+    suffix = "/stream" if args.stream else ""
+    requests = [("family", f"/api/family/summary{suffix}")]
+    if args.batch:
+        requests.append(("members", "/api/family/summary/members"))
+    else:
+        requests += [("user", f"/api/family/users/{member_id}/summary{suffix}") for member_id in member_ids]
+
+    timings = []
+    for route, path in requests:
+        if args.no_cache:
+            clear_caches(family_id)
+        # The members endpoint has no streaming variant
+        stream = args.stream and route != "members"
+        timings.append((route, timed_request(client, path, headers, body, stream)))
+    return timings
+
+
+def percentiles(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "p50_ms": round(statistics.median(values), 2),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        "max_ms": round(values[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark summary endpoints against the fake LLM backend")
+    parser.add_argument("--members", type=int, default=8, help="Members in the benchmark family")
+    parser.add_argument("--posts", type=int, default=400, help="Posts to seed for today")
+    parser.add_argument("--messages", type=int, default=200, help="Messages to seed for today")
+    parser.add_argument("--rounds", type=int, default=10, help="Rounds of family and member summaries")
+    parser.add_argument("--concurrency", type=int, default=1, help="Rounds running at the same time")
+    parser.add_argument("--latency-ms", type=float, default=settings.FAKE_LLM_LATENCY_MS,
+                        help="Fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=settings.FAKE_LLM_TOKENS_PER_SECOND,
+                        help="Fake LLM output rate (0 = instant)")
+    parser.add_argument("--no-cache", action="store_true", help="Clear stored and cached summaries before each request")
+    parser.add_argument("--batch", action="store_true", help="Use POST /summary/members instead of per-member requests")
+    parser.add_argument("--stream", action="store_true", help="Use the Server-Sent Events endpoints")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--cleanup", action="store_true", help="Remove the benchmark family and exit")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.cleanup:
+            cleanup(conn)
+            return
+        family_id, member_ids = seed(conn, args.members, args.posts, args.messages)
+
+    settings.LLM_BACKEND = "fake"
+    settings.FAKE_LLM_LATENCY_MS = args.latency_ms
+    settings.FAKE_LLM_TOKENS_PER_SECOND = args.tokens_per_second
+    token = create_access_token({"sub": str(member_ids[0]), "family_id": str(family_id)})
+    headers = {"Authorization": f"Bearer {token}"}
+    # No context manager: startup hooks (the summary worker pool) stay off
+    client = TestClient(app)
+
+    if not args.no_cache:
+        # Start from an empty store so the first rounds show the cold path
+        clear_caches(family_id)
+    counters_before = dict(metrics.snapshot()["counters"])
+
+    print(f"⏱️  {args.rounds} rounds, concurrency {args.concurrency}, "
+          f"cache={'off' if args.no_cache else 'on'} batch={'on' if args.batch else 'off'} "
+          f"stream={'on' if args.stream else 'off'}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        rounds = list(executor.map(
+            lambda _: run_round(client, family_id, member_ids, headers, args), range(args.rounds)
+        ))
+    elapsed = time.perf_counter() - started
+
+    by_route = defaultdict(list)
+    for timings in rounds:
+        for route, timing in timings:
+            by_route[route].append(timing)
+
+    results = {}
+    for route, timings in by_route.items():
+        r = {
+            "requests": len(timings),
+            "errors": sum(1 for t in timings if not t["ok"]),
+            **percentiles([t["ms"] for t in timings]),
+        }
+        first_events = [t["first_event_ms"] for t in timings if t["first_event_ms"] is not None]
+        if first_events:
+            r["first_event"] = percentiles(first_events)
+        results[route] = r
+        print(f"{route:8} requests={r['requests']:>5} errors={r['errors']:>3} "
+              f"p50={r['p50_ms']:>9.2f}ms p95={r['p95_ms']:>9.2f}ms max={r['max_ms']:>9.2f}ms"
+              + (f" first_event_p50={r['first_event']['p50_ms']:.2f}ms" if first_events else ""))
+
+    total_requests = sum(len(timings) for timings in by_route.values())
+    counters = {
+        name: value - counters_before.get(name, 0)
+        for name, value in metrics.snapshot()["counters"].items()
+        if name.startswith(("summary.", "llm.")) and value != counters_before.get(name, 0)
+    }
+    print(f"\n✓ {total_requests} requests in {elapsed:.1f}s "
+          f"({total_requests / elapsed:.2f} req/s, {args.rounds / elapsed:.2f} rounds/s)")
+    for name, value in sorted(counters.items()):
+        print(f"  {name} = {value:g}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "members": len(member_ids),
+                "posts": args.posts,
+                "messages": args.messages,
+                "rounds": args.rounds,
+                "concurrency": args.concurrency,
+                "options": {
+                    "cache": not args.no_cache,
+                    "batch": args.batch,
+                    "stream": args.stream,
+                    "latency_ms": args.latency_ms,
+                    "tokens_per_second": args.tokens_per_second,
+                },
+                "elapsed_s": round(elapsed, 3),
+                "requests_per_second": round(total_requests / elapsed, 2),
+                "results": results,
+                "counters": counters,
+            }, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
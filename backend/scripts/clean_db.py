@@ -2,7 +2,8 @@
 """
 Database Cleanup Script
 
-This script drops all tables and recreates them with the current schema.
+This script drops all tables and recreates them by running the Alembic
+migrations from scratch.
 Use this when you want to start fresh after data model changes.
 
 WARNING: This will delete ALL data in the database!
@@ -14,6 +15,8 @@ import os
 # Add parent directory to path to import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from alembic import command
+from alembic.config import Config
 from sqlalchemy import text
 from app.database import engine, Base
 from app.models import (
@@ -43,11 +46,15 @@ def clean_database():
             # Drop all tables
             print("\n📋 Dropping all tables...")
             Base.metadata.drop_all(bind=engine)
+            with conn.begin():
+                conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+                conn.execute(text("DROP TYPE IF EXISTS reactiontype"))
             print("✓ All tables dropped successfully")
             
             # Recreate all tables
-            print("\n🔨 Creating tables with current schema...")
-            Base.metadata.create_all(bind=engine)
+            print("\n🔨 Running migrations...")
+            alembic_cfg = Config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini"))
+            command.upgrade(alembic_cfg, "head")
             print("✓ All tables created successfully")
             
             # Verify tables exist
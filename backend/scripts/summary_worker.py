@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Summary Worker
+
+Runs summary job workers and the nightly scheduler outside the API
+process. Jobs are claimed from the summary_jobs table with SKIP LOCKED,
+so this can run alongside the API's own workers.
+
+Only scheduled jobs (which use GROQ_API_KEY) run here: jobs requested by
+users run in the API process holding their API key.
+
+Usage:
+    python scripts/summary_worker.py [--workers N]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.summary_jobs import SummaryWorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run summary job workers")
+    parser.add_argument("--workers", type=int, default=max(1, settings.SUMMARY_WORKERS))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not settings.GROQ_API_KEY:
+        print("❌ GROQ_API_KEY is not set; scheduled summaries cannot run")
+        sys.exit(1)
+
+    pool = SummaryWorkerPool(workers=args.workers)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+    pool.start()
+    print(f"✅ Summary worker running with {args.workers} workers")
+    stopped.wait()
+    pool.stop()
+    print("👋 Summary worker stopped")
+
+
+if __name__ == "__main__":
+    main()
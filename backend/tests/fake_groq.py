@@ -0,0 +1,91 @@
+"""Local stand-in for the Groq chat completions API, with injectable latency and errors"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # Clients hanging up on slow responses are expected
+
+
+class FakeGroqServer:
+    """
+    Serves POST /openai/v1/chat/completions on a random local port.
+
+    Per model, set_behavior() configures a delay before responding and the
+    status to respond with (500s use the API's error body). Every request
+    is recorded as (model, client port) so tests can count attempts and
+    connections.
+    """
+
+    def __init__(self):
+        self.behaviors = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is observable
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                model = body["model"]
+                with server._lock:
+                    server.requests.append((model, self.client_address[1]))
+                    delay, status = server.behaviors.get(model, (0.0, 200))
+                time.sleep(delay)
+                if status == 200:
+                    payload = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": f"reply from {model}"},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 3, "total_tokens": 4},
+                    }
+                else:
+                    payload = {"error": {"message": "injected failure", "type": "internal_server_error"}}
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up (timeout)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _QuietServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def set_behavior(self, model: str, delay: float = 0.0, status: int = 200):
+        with self._lock:
+            self.behaviors[model] = (delay, status)
+
+    def attempts(self, model: str) -> int:
+        with self._lock:
+            return sum(1 for requested, _ in self.requests if requested == model)
+
+    def client_ports(self) -> set:
+        with self._lock:
+            return {port for _, port in self.requests}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database import InstrumentedQueuePool
+from app.metrics import metrics
+
+
+def test_pool_records_checkout_waits_and_timeouts():
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2)
+    checkouts = metrics.snapshot()["timers"].get("db.pool.checkout_wait_ms", {}).get("count", 0)
+    timeouts = metrics.counter("db.pool.checkout_timeouts")
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    waits = metrics.snapshot()["timers"]["db.pool.checkout_wait_ms"]
+    assert waits["count"] == checkouts + 2
+    assert waits["max"] >= 200
+    assert metrics.counter("db.pool.checkout_timeouts") == timeouts + 1
+    engine.dispose()
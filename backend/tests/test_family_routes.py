@@ -0,0 +1,122 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.routes import family as family_routes
+from app.auth import get_current_family_id, get_current_user
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.models import Family, User
+
+
+def test_get_user_families_lists_the_callers_families(client, monkeypatch):
+    user = User(id=uuid.uuid4(), username="margaret")
+    now = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    families = [
+        Family(id=uuid.uuid4(), name="Smith", created_at=now, updated_at=now),
+        Family(id=uuid.uuid4(), name="Patel", created_at=now, updated_at=now),
+    ]
+    session = object()
+    calls = []
+
+    def load_user_families(db, user_id):
+        calls.append((db, user_id))
+        return families
+
+    monkeypatch.setattr(family_routes, "load_user_families", load_user_families)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: session
+
+    response = client.get("/api/family")
+
+    assert response.status_code == 200
+    assert [f["name"] for f in response.json()] == ["Smith", "Patel"]
+    assert [f["id"] for f in response.json()] == [str(f.id) for f in families]
+    assert calls == [(session, user.id)]
+
+
+class SlowSummaries:
+    """_generate_member_summary stand-in that records how many run at once"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = self.peak = self.started = 0
+
+    def __call__(self, llm_service, key, fingerprint, posts_data, messages_data):
+        with self.lock:
+            self.started += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        return {"post_summary": f"summary of {key.subject_id}", "sentiment": "cheerful"}
+
+
+@pytest.fixture
+def member_summaries(monkeypatch):
+    """A ten-member family with nothing stored; returns a function installing the generator"""
+    user = User(id=uuid.uuid4(), username="margaret")
+    roster = [SimpleNamespace(id=uuid.uuid4(), username=f"member{i}") for i in range(10)]
+    monkeypatch.setattr(family_routes, "get_family_roster", lambda db, family_id: roster)
+    monkeypatch.setattr(family_routes, "load_member_day_stats", lambda *args: {})
+    monkeypatch.setattr(family_routes, "load_member_summaries", lambda db, keys: {})
+    monkeypatch.setattr(family_routes, "load_member_day_items", lambda *args: ({}, {}))
+    monkeypatch.setattr(settings, "SUMMARY_CONCURRENCY", 2)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_family_id] = lambda: uuid.uuid4()
+    app.dependency_overrides[get_db] = lambda: object()
+
+    def install(generate):
+        monkeypatch.setattr(family_routes, "_generate_member_summary", generate)
+
+    return install
+
+
+def test_member_summaries_run_at_most_summary_concurrency_at_once(client, member_summaries, monkeypatch):
+    generate = SlowSummaries(delay=0.05)
+    member_summaries(generate)
+    monkeypatch.setattr(settings, "SUMMARY_TIMEOUT_SECONDS", 5.0)
+
+    response = client.post("/api/family/summary/members", json={"groq_api_key": "key"})
+
+    assert response.status_code == 200
+    assert response.json()["complete"]
+    assert {m["status"] for m in response.json()["members"]} == {"generated"}
+    assert generate.started == 10 and generate.peak == 2
+
+
+def test_timed_out_member_summaries_leave_no_work_behind(client, member_summaries, monkeypatch):
+    generate = SlowSummaries(delay=0.5)
+    member_summaries(generate)
+    monkeypatch.setattr(settings, "SUMMARY_TIMEOUT_SECONDS", 0.2)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(
+            lambda _: client.post("/api/family/summary/members", json={"groq_api_key": "key"}), range(8)
+        ))
+
+    for response in responses:
+        assert response.status_code == 200
+        assert not response.json()["complete"]
+        assert {m["status"] for m in response.json()["members"]} == {"timeout"}
+    # Once the started members finish nothing else runs: members not started
+    # by the deadline are dropped, not left queued behind the request
+    _wait_for(lambda: generate.running == 0, timeout=2.0)
+    time.sleep(0.1)
+    assert generate.running == 0 and generate.started <= 8 * 2
+    assert len([t for t in threading.enumerate() if t.name.startswith("llm-task")]) <= settings.LLM_TASK_THREADS
+
+
+def _wait_for(condition, timeout: float):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.02)
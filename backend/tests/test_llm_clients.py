@@ -0,0 +1,32 @@
+from app.services.llm_clients import GroqClientRegistry
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_registry_reuses_clients_and_connections(fake_groq):
+    registry = GroqClientRegistry(base_url=fake_groq.url)
+    try:
+        assert registry.get("key-a") is registry.get("key-a")
+        assert registry.get("key-a") is not registry.get("key-b")
+
+        for api_key in ["key-a", "key-b", "key-a", "key-c", "key-b"]:
+            response = registry.get(api_key).chat.completions.create(model="llama-test", messages=MESSAGES)
+            assert response.choices[0].message.content == "reply from llama-test"
+
+        # Sequential calls with any key go over one keep-alive connection
+        assert fake_groq.attempts("llama-test") == 5
+        assert len(fake_groq.client_ports()) == 1
+    finally:
+        registry.close()
+
+
+def test_separate_registries_open_separate_connections(fake_groq):
+    # Baseline for the test above: the port really identifies a connection
+    registries = [GroqClientRegistry(base_url=fake_groq.url) for _ in range(2)]
+    try:
+        for registry in registries:
+            registry.get("key-a").chat.completions.create(model="llama-test", messages=MESSAGES)
+        assert len(fake_groq.client_ports()) == 2
+    finally:
+        for registry in registries:
+            registry.close()
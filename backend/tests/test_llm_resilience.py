@@ -0,0 +1,166 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import settings
+from app.services import llm_backends, llm_resilience
+from app.services.llm_backends import GroqBackend
+from app.services.llm_clients import GroqClientRegistry
+from app.services.llm_resilience import CLOSED, HALF_OPEN, OPEN, LLMUnavailableError, call_with_fallback, get_breaker
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def groq(fake_groq, monkeypatch):
+    """GroqBackend calls go to the fake server (as with GROQ_BASE_URL pointing at it)"""
+    registry = GroqClientRegistry(base_url=fake_groq.url)
+    monkeypatch.setattr(llm_backends, "groq_clients", registry)
+    monkeypatch.setattr(settings, "LLM_BREAKER_MIN_CALLS", 2)
+    monkeypatch.setattr(settings, "LLM_BREAKER_ERROR_RATE", 0.5)
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SECONDS", 0.1)
+    yield fake_groq
+    registry.close()
+
+
+def models():
+    """Fresh model names, so breakers and latency samples don't carry over between tests"""
+    suffix = uuid.uuid4().hex[:8]
+    return f"primary-{suffix}", f"fallback-{suffix}"
+
+
+class Attempts:
+    """call() for call_with_fallback through GroqBackend, recording when each attempt ends"""
+
+    def __init__(self):
+        self.backend = GroqBackend("test-key")
+        self.finished = []
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, model: str, timeout: float) -> str:
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self.backend.complete(model, MESSAGES, 0.5, 50, timeout)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.finished.append((model, time.monotonic()))
+
+
+def test_breaker_opens_half_opens_and_closes(groq):
+    primary, fallback = models()
+    call = Attempts()
+    groq.set_behavior(primary, status=500)
+
+    # Each primary failure falls back at once; two failures open the breaker
+    for _ in range(2):
+        assert call_with_fallback(primary, fallback, call) == f"reply from {fallback}"
+    assert get_breaker(primary).state == OPEN
+    assert groq.attempts(primary) == 2
+
+    # Open: the primary is skipped
+    assert call_with_fallback(primary, fallback, call) == f"reply from {fallback}"
+    assert groq.attempts(primary) == 2
+
+    # After LLM_BREAKER_OPEN_SECONDS one trial call goes through and closes it
+    time.sleep(0.6)
+    assert get_breaker(primary).state == HALF_OPEN
+    groq.set_behavior(primary)
+    assert call_with_fallback(primary, fallback, call) == f"reply from {primary}"
+    assert get_breaker(primary).state == CLOSED
+    assert groq.attempts(primary) == 3
+
+
+def test_failed_half_open_trial_reopens(groq):
+    primary, fallback = models()
+    call = Attempts()
+    groq.set_behavior(primary, status=500)
+    for _ in range(2):
+        call_with_fallback(primary, fallback, call)
+    time.sleep(0.6)
+
+    assert call_with_fallback(primary, fallback, call) == f"reply from {fallback}"
+    assert get_breaker(primary).state == OPEN
+
+
+def test_hedges_to_fallback_after_hedge_delay(groq):
+    primary, fallback = models()
+    call = Attempts()
+    groq.set_behavior(primary, delay=2.0)
+
+    started = time.monotonic()
+    assert call_with_fallback(primary, fallback, call) == f"reply from {fallback}"
+    elapsed = time.monotonic() - started
+
+    # No latency samples yet, so the hedge waits LLM_HEDGE_DEFAULT_SECONDS
+    assert 0.3 <= elapsed < 1.0
+    assert groq.attempts(primary) == 1
+    assert groq.attempts(fallback) == 1
+
+
+def test_no_hedge_when_disabled(groq):
+    primary, fallback = models()
+    call = Attempts()
+    groq.set_behavior(primary, delay=0.6)
+
+    assert call_with_fallback(primary, fallback, call, hedge=False) == f"reply from {primary}"
+    assert groq.attempts(fallback) == 0
+
+
+def test_deadline_cuts_slow_attempts(groq):
+    primary, fallback = models()
+    call = Attempts()
+    groq.set_behavior(primary, delay=3.0)
+    groq.set_behavior(fallback, delay=3.0)
+
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailableError):
+        call_with_fallback(primary, fallback, call, deadline_seconds=0.5, hedge=False)
+    assert time.monotonic() - started < 0.8
+
+    # The abandoned attempt times out at the deadline instead of running for
+    # the full 3s (or being retried by the SDK)
+    _wait_for(lambda: call.in_flight == 0, timeout=1.0)
+    assert all(finished - started < 1.0 for _, finished in call.finished)
+    assert groq.attempts(primary) == 1
+    assert groq.attempts(fallback) == 0
+
+
+def test_timed_out_calls_do_not_leak_executor_threads(groq):
+    primary, fallback = models()
+    call = Attempts()
+    groq.set_behavior(primary, delay=3.0)
+    groq.set_behavior(fallback, delay=3.0)
+    callers = settings.LLM_CALL_THREADS + 8
+
+    def timed_out_call(_):
+        with pytest.raises(LLMUnavailableError):
+            call_with_fallback(primary, fallback, call, deadline_seconds=0.3)
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        list(pool.map(timed_out_call, range(callers)))
+
+    # Every attempt, including ones queued behind a full pool, ends shortly after its deadline
+    _wait_for(lambda: call.in_flight == 0 and llm_resilience._executor._work_queue.empty(), timeout=2.0)
+    llm_threads = [t for t in threading.enumerate() if t.name.startswith("llm-call")]
+    assert len(llm_threads) <= settings.LLM_CALL_THREADS
+
+    # The pool is free again: a healthy model answers without queueing
+    healthy, _ = models()
+    started = time.monotonic()
+    assert call_with_fallback(healthy, fallback, call) == f"reply from {healthy}"
+    assert time.monotonic() - started < 0.5
+
+
+def _wait_for(condition, timeout: float):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.02)
@@ -0,0 +1,42 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.services.llm_backends import FakeLLMBackend
+from app.services.llm_service import CHUNK_PROMPT, GroqLLMService
+
+
+def test_chunk_summaries_share_the_bounded_task_pool():
+    service = GroqLLMService("key", backend=FakeLLMBackend(latency_ms=20, tokens_per_second=0))
+    lock = threading.Lock()
+    running, peak, thread_names = 0, 0, set()
+    summarize_chunk = service._summarize_chunk
+
+    def tracked_summarize_chunk(prompt):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+            thread_names.add(threading.current_thread().name)
+        try:
+            return summarize_chunk(prompt)
+        finally:
+            with lock:
+                running -= 1
+
+    service._summarize_chunk = tracked_summarize_chunk
+    callers = 4
+    chunks_per_caller = settings.LLM_TASK_THREADS
+
+    def summarize(_):
+        chunks = [f"- chunk {i} {uuid.uuid4().hex}" for i in range(chunks_per_caller)]
+        partials = service._summarize_chunks(chunks, CHUNK_PROMPT)
+        # Results come back in chunk order
+        assert partials == [summarize_chunk(CHUNK_PROMPT.format(chunk=chunk)) for chunk in chunks]
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        list(pool.map(summarize, range(callers)))
+
+    assert 1 < peak <= settings.LLM_TASK_THREADS
+    assert all(name.startswith("llm-task") for name in thread_names)
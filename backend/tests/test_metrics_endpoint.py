@@ -0,0 +1,17 @@
+from app.config import settings
+
+
+def test_metrics_is_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_requires_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"counters", "timers", "gauges"}
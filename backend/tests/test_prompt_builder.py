@@ -0,0 +1,80 @@
+import random
+
+from app.services import prompt_builder
+from app.services.prompt_builder import PromptItem, _WORD_RE, _near_identical, dedupe
+
+WORDS = [f"w{i}" for i in range(400)] + ["the", "and", "we", "had", "so", "much", "fun", "today"]
+
+
+def pairwise_dedupe(items, threshold=0.9):
+    """Reference: compare each item with every kept item (exact duplicates first)"""
+    kept, kept_words = [], []
+    for item in items:
+        words = frozenset(w.lower() for w in _WORD_RE.findall(item.text))
+        duplicate_of = next((i for i, other in enumerate(kept_words) if other == words), None)
+        if duplicate_of is None:
+            duplicate_of = next(
+                (i for i, other in enumerate(kept_words) if _near_identical(words, other, threshold)), None
+            )
+        if duplicate_of is None:
+            kept.append(PromptItem(item.text, item.created_at, item.reactions))
+            kept_words.append(words)
+        else:
+            kept[duplicate_of].reactions += item.reactions
+    return kept
+
+
+def make_items(rng, count, variants, vocabulary=WORDS):
+    """count items: originals plus near-copies with one word swapped or dropped"""
+    items = []
+    for i in range(count):
+        if items and rng.random() < variants:
+            words = rng.choice(items).text.split()
+            if rng.random() < 0.5:
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            else:
+                words.pop(rng.randrange(len(words)))
+        else:
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(3, 40))]
+        items.append(PromptItem(" ".join(words), f"2024-05-01T{i:06d}", rng.randint(0, 3)))
+    return items
+
+
+def test_dedupe_matches_pairwise_comparison():
+    rng = random.Random(7)
+    for vocabulary in (WORDS, WORDS[-50:]):
+        items = make_items(rng, 1000, variants=0.4, vocabulary=vocabulary)
+        expected = pairwise_dedupe(items)
+        assert [(k.text, k.reactions) for k in dedupe(items)] == [(k.text, k.reactions) for k in expected]
+
+
+def test_dedupe_merges_reactions_into_the_first_copy():
+    items = [
+        PromptItem("Pancakes for breakfast with grandma today and everyone loved them", "1", 2),
+        PromptItem("Soccer practice ran late", "2", 1),
+        PromptItem("pancakes for breakfast with grandma today and everyone loved them!", "3", 5),
+        PromptItem("Pancakes for breakfast with grandma today and everyone loved them so", "4", 1),
+    ]
+    kept = dedupe(items)
+    assert [k.created_at for k in kept] == ["1", "2"]
+    assert kept[0].reactions == 8
+
+
+def test_dedupe_compares_only_lsh_candidates(monkeypatch):
+    comparisons = 0
+
+    def counting_near_identical(a, b, threshold):
+        nonlocal comparisons
+        comparisons += 1
+        return _near_identical(a, b, threshold)
+
+    monkeypatch.setattr(prompt_builder, "_near_identical", counting_near_identical)
+    rng = random.Random(3)
+    for vocabulary in (WORDS, WORDS[-50:]):
+        items = make_items(rng, 5000, variants=0.3, vocabulary=vocabulary)
+        items += items[:500]  # Exact reposts
+        comparisons = 0
+        kept = dedupe(items)
+        assert sum(k.reactions for k in kept) == sum(i.reactions for i in items)
+        # Pairwise comparison needs millions here; LSH a handful per item
+        assert comparisons <= 10 * len(items), f"{comparisons} comparisons for {len(items)} items"
@@ -0,0 +1,89 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app import database
+from app.api.routes import auth as auth_routes
+from app.database import WRITE_TOKEN_HEADER
+
+
+class FakeSession:
+    """Just enough of a Session for signup, login and /me, backed by a list of rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, model):
+        return FakeQuery(self.rows, model)
+
+    def add(self, row):
+        self.rows.append(row)
+
+    def add_all(self, rows):
+        self.rows.extend(rows)
+
+    def flush(self):
+        now = datetime.now(timezone.utc)
+        for row in self.rows:
+            if getattr(row, "id", None) is None:
+                row.id = uuid.uuid4()
+                row.created_at = row.updated_at = now
+
+    def commit(self):
+        self.flush()
+
+    def refresh(self, row):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeQuery:
+    def __init__(self, rows, model):
+        self.rows = [row for row in rows if isinstance(row, model)]
+
+    def filter(self, *criteria):
+        for criterion in criteria:
+            key, value = criterion.left.key, criterion.right.value
+            self.rows = [row for row in self.rows if getattr(row, key) == value]
+        return self
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+@pytest.fixture
+def lagging_replica(monkeypatch):
+    """A healthy replica that has not replayed anything the primary committed"""
+    primary_rows = []
+    monkeypatch.setattr(database, "SessionLocal", lambda: FakeSession(primary_rows))
+    monkeypatch.setattr(database, "ReplicaSessionLocal", lambda: FakeSession([]))
+    monkeypatch.setattr(database, "_replica_is_healthy", lambda: True)
+    monkeypatch.setattr(database, "_recent_writers", {})
+    monkeypatch.setattr(auth_routes, "resolve_or_create_families", lambda db, names: [])
+    monkeypatch.setattr(auth_routes, "get_user_families", lambda db, user_id: [])
+    return primary_rows
+
+
+def test_new_user_reads_from_primary_after_signup(client, lagging_replica):
+    signup = client.post("/api/auth/signup", json={
+        "username": "margaret", "email": "margaret@example.com",
+        "password": "secret123", "family_names": ["Smith"],
+    })
+    assert signup.status_code == 201
+    write_token = signup.headers[WRITE_TOKEN_HEADER]
+
+    login = client.post("/api/auth/login", data={"username": "margaret", "password": "secret123"})
+    assert login.status_code == 200
+    bearer = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Another worker: only the client's write token says this user just wrote
+    database._recent_writers.clear()
+    me = client.get("/api/auth/me", headers={**bearer, WRITE_TOKEN_HEADER: write_token})
+    assert me.status_code == 200
+    assert me.json()["username"] == "margaret"
+
+    # Without the token the read goes to the replica, which has not seen the user yet
+    assert client.get("/api/auth/me", headers=bearer).status_code == 401
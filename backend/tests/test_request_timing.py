@@ -0,0 +1,22 @@
+import re
+
+import fastapi.routing
+
+from app.main import app
+from app.request_timing import TimedRoute
+
+
+def test_every_api_route_is_timed():
+    api_routes = [route for route in app.routes if isinstance(route, fastapi.routing.APIRoute)]
+    assert api_routes and all(isinstance(route, TimedRoute) for route in api_routes)
+
+
+def test_server_timing_reports_phases(client):
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy"}
+    phases = dict(re.findall(r"(\w+);dur=([\d.]+)", response.headers["Server-Timing"]))
+    assert set(phases) == {"total", "db", "serialize", "llm"}
+    assert float(phases["total"]) >= float(phases["serialize"]) > 0
+    assert float(phases["db"]) == 0
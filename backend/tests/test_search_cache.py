@@ -0,0 +1,25 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.search_cache import bump_search_version
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+
+def test_bump_search_version_leaves_updated_at_alone():
+    db = RecordingSession()
+
+    bump_search_version(db, uuid.uuid4())
+
+    statement, = db.statements
+    sql = " ".join(str(statement.compile(dialect=postgresql.dialect())).split())
+    assert "search_version=(families.search_version + %(search_version_1)s)" in sql
+    # Carried over rather than left to the column's onupdate=now()
+    assert "updated_at=families.updated_at" in sql
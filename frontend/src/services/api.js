@@ -2,6 +2,9 @@ import axios from 'axios';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
+// Returned after writes; sent back so reads see our own writes on any server
+const WRITE_TOKEN_HEADER = 'X-DB-Write-Token';
+
 const api = axios.create({
   baseURL: API_URL,
   headers: {
@@ -16,6 +19,10 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    const writeToken = sessionStorage.getItem('dbWriteToken');
+    if (writeToken) {
+      config.headers[WRITE_TOKEN_HEADER] = writeToken;
+    }
     return config;
   },
   (error) => {
@@ -25,7 +32,13 @@ api.interceptors.request.use(
 
 // Handle 401 errors (unauthorized)
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const writeToken = response.headers[WRITE_TOKEN_HEADER.toLowerCase()];
+    if (writeToken) {
+      sessionStorage.setItem('dbWriteToken', writeToken);
+    }
+    return response;
+  },
   (error) => {
     if (error.response?.status === 401) {
       localStorage.removeItem('token');